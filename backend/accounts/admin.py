@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from products.thumbnails import USER_AVATAR, schedule_thumbnails
 from .models import User
 # Register your models here.
 
@@ -34,3 +35,8 @@ class CustomUserAdmin(UserAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+
+        if obj.avatar and 'avatar' in form.changed_data:
+            schedule_thumbnails([obj.avatar.name], USER_AVATAR)
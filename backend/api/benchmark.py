@@ -0,0 +1,60 @@
+"""
+Данные для замеров API (команды benchmark_renderers, benchmark_list_views).
+
+Замеры работают во временной тестовой базе без Redis и кэша ORM:
+прайс-лист генерируется и импортируется, покупателю создаются заказы.
+"""
+import random
+
+from django.contrib.auth import get_user_model
+
+from contacts.models import Contact
+from importer.generator import generate_price_list
+from importer.services import import_products_from_yaml
+from orders.models import Order, OrderItem
+from products.models import ProductInfo
+
+
+# Без Redis и без кэша ORM: замер должен работать на чистой машине
+BENCHMARK_SETTINGS = {
+    "CACHES": {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    },
+    "CACHALOT_ENABLED": False,
+}
+
+
+def create_benchmark_data(work_dir, goods, orders, items):
+    """
+    Импортирует прайс-лист на goods товаров и создаёт orders заказов
+    по items позиций. Возвращает (поставщик, покупатель).
+    """
+    User = get_user_model()
+    # SupplierOrderDetailSerializer ищет магазин по имени пользователя
+    supplier = User.objects.create_user(
+        username="Benchmark", email="benchmark@shop.local", password="benchmark",
+        is_staff=True,
+    )
+    path = work_dir / "price_list.yaml"
+    generate_price_list(path, goods=goods, shop="Benchmark")
+    import_products_from_yaml(path, supplier)
+
+    customer = User.objects.create_user(
+        username="customer", email="customer@shop.local", password="customer"
+    )
+    contact = Contact.objects.create(
+        user=customer, city="Москва", street="Тверская", house="1", phone="+79990000000"
+    )
+    offers = list(ProductInfo.objects.values_list("id", "price"))
+    rng = random.Random(0)
+    for _ in range(orders):
+        order = Order.objects.create(user=customer, contact=contact, status="confirmed")
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order, product_info_id=offer_id, price=price,
+                quantity=rng.randint(1, 5), status="confirmed",
+            )
+            for offer_id, price in rng.sample(offers, min(items, len(offers)))
+        )
+    Order.objects.filter(user=customer).update_totals()
+    return supplier, customer
@@ -0,0 +1,144 @@
+"""
+Кэш ответов публичного каталога.
+
+Ключ ответа — версия данных (products/versions.py), схема, хост и
+query-параметры запроса. Версия меняется после каждой пересборки документов каталога,
+поэтому устаревший ответ не отдаётся ни секунды, а TTL нужен только
+чтобы Redis не хранил ответы старых версий вечно.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.encoding import force_bytes
+from django.utils.http import http_date, quote_etag
+
+from rest_framework.response import Response
+
+from products import versions
+
+
+RESPONSE_KEY = "api:response:{}:{}"
+STATS_KEY = "api:response:stats:{}"
+
+
+def _count(name):
+    key = STATS_KEY.format(name)
+    # add + incr — атомарно и без гонки при первом обращении
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # ключ вытеснен между add и incr — счётчик не важнее ответа
+        pass
+
+
+def cache_stats():
+    """Число попаданий и промахов кэша ответов с момента сброса."""
+    found = cache.get_many([STATS_KEY.format("hits"), STATS_KEY.format("misses")])
+    hits = found.get(STATS_KEY.format("hits"), 0)
+    misses = found.get(STATS_KEY.format("misses"), 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else 0.0,
+    }
+
+
+def reset_cache_stats():
+    cache.delete_many([STATS_KEY.format("hits"), STATS_KEY.format("misses")])
+
+
+def _digest(*parts):
+    return hashlib.md5(force_bytes(repr(parts))).hexdigest()
+
+
+def _origin(request):
+    # в ответах абсолютные ссылки (изображения, следующая страница)
+    return request.scheme, request.get_host()
+
+
+def _query(request):
+    return sorted(
+        (key, value)
+        for key in request.query_params
+        for value in request.query_params.getlist(key)
+    )
+
+
+class ConditionalGetMixin:
+    """
+    Условный GET по версиям данных.
+
+    Представление задаёт data_versions() — версии (products/versions.py,
+    orders/versions.py), от которых зависит ответ; их чтение — один запрос
+    к кэшу. Из них строятся строгий ETag и Last-Modified, и если копия
+    клиента актуальна (If-None-Match / If-Modified-Since), возвращается
+    304 без запросов к БД и без сериализации.
+    """
+    # ответ зависит от пользователя — общим кэшам хранить его нельзя
+    private_response = False
+
+    def data_versions(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        data_versions = self.data_versions(request, *args, **kwargs)
+        etag = quote_etag(_digest(
+            type(self).__name__,
+            data_versions,
+            request.user.pk if self.private_response else None,
+            request.accepted_media_type,
+            _origin(request),
+            request.path,
+            _query(request),
+        ))
+        last_modified = max(data_versions) // 10 ** 9
+
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = self.versioned_get(request, data_versions, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            # клиент хранит копию, но перед использованием сверяет валидаторы
+            patch_cache_control(response, no_cache=True, private=self.private_response)
+        return response
+
+    def versioned_get(self, request, data_versions, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class CachedResponseMixin(ConditionalGetMixin):
+    """
+    Кэширует успешные GET-ответы каталога.
+
+    Ключ — версии данных из data_versions() (по умолчанию версия каталога),
+    схема, хост и query-параметры. В кэше хранятся уже сериализованные данные,
+    при попадании запросов к БД нет.
+    """
+
+    def data_versions(self, request, *args, **kwargs):
+        return [versions.catalog_version()]
+
+    def versioned_get(self, request, data_versions, *args, **kwargs):
+        key = RESPONSE_KEY.format(
+            "-".join(map(str, data_versions)),
+            _digest(_origin(request), request.path, _query(request)),
+        )
+        data = cache.get(key)
+        if data is not None:
+            _count("hits")
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        _count("misses")
+        response = super().versioned_get(request, data_versions, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_RESPONSE_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
@@ -0,0 +1,111 @@
+"""
+Потоковая выгрузка каталога (CSV / JSON Lines).
+
+Документы CatalogEntry читаются keyset-пачками (WHERE pk > <последний>
+ORDER BY pk LIMIT n): каждая пачка — короткий запрос, без OFFSET,
+долгой транзакции и курсора на весь каталог. Строки пачки сразу
+кодируются и отдаются генератором StreamingHttpResponse, поэтому память
+не растёт с размером каталога. При compress=gzip поток сжимается
+на лету тем же генератором.
+"""
+import csv
+import io
+import json
+import zlib
+
+from cachalot.api import cachalot_disabled
+
+from products.models import CatalogEntry
+from products.projections import with_parameters
+
+from .renderers import ujson
+
+
+# сколько документов каталога читается одним запросом
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_TYPES = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl": ("application/x-ndjson; charset=utf-8", "jsonl"),
+}
+
+CSV_HEADER = (
+    "product_id", "name", "category", "offer_id", "shop", "price", "quantity", "parameters",
+)
+
+
+def _dumps(data):
+    if ujson is not None:
+        return ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def catalog_chunks(chunk_size=EXPORT_CHUNK_SIZE):
+    """Пачки строк (id, имя, категория, предложения, их параметры) по возрастанию id."""
+    last_pk = 0
+    while True:
+        # пачки выгрузки не нужны в кэше запросов
+        with cachalot_disabled():
+            rows = list(
+                CatalogEntry.objects.filter(pk__gt=last_pk).order_by("pk")
+                .values_list("pk", "name", "category_name", "offers", "offer_parameters")
+                [:chunk_size]
+            )
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][0]
+
+
+def _jsonl(chunks):
+    # строка — товар в формате списка товаров
+    for rows in chunks:
+        yield "".join(
+            _dumps({
+                "id": pk,
+                "name": name,
+                "category": {"name": category},
+                "product_infos": with_parameters(offers, parameters),
+            }) + "\n"
+            for pk, name, category, offers, parameters in rows
+        ).encode()
+
+
+def _csv(chunks):
+    # строка — предложение; товар без предложений — строка с пустыми полями предложения
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for rows in chunks:
+        for pk, name, category, offers, parameters in rows:
+            if not offers:
+                writer.writerow((pk, name, category, "", "", "", "", ""))
+            for offer in with_parameters(offers, parameters):
+                writer.writerow((
+                    pk, name, category, offer["id"], offer["shop"], offer["price"],
+                    offer["quantity"],
+                    "; ".join(
+                        f"{parameter['parameter']['name']}: {parameter['value']}"
+                        for parameter in offer["parameters"]
+                    ),
+                ))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _gzip(stream):
+    # wbits=31 — формат gzip (заголовок и CRC), а не голый deflate
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for data in stream:
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(export_type, compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """Генератор байтов выгрузки каталога в формате export_type (EXPORT_TYPES)."""
+    encode = _csv if export_type == "csv" else _jsonl
+    stream = encode(catalog_chunks(chunk_size))
+    return _gzip(stream) if compress else stream
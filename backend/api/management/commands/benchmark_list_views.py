@@ -0,0 +1,85 @@
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from rest_framework.test import APIClient
+
+from api.benchmark import BENCHMARK_SETTINGS, create_benchmark_data
+
+
+# Кэш-заглушка: каждый запрос проходит весь путь (кэш ответов всегда
+# промахивается, throttling не срабатывает), silk не пишет запросы в базу
+LIST_BENCHMARK_SETTINGS = {
+    **BENCHMARK_SETTINGS,
+    "CACHES": {
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    },
+    "MIDDLEWARE": [m for m in settings.MIDDLEWARE if not m.startswith("silk.")],
+    "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+}
+
+MODES = (("serializers", False), ("projections", True))
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures requests/sec of the product and order list endpoints with "
+        "serializers and with .values() projections in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--goods", type=int, default=1_000,
+                            help="Number of goods in the generated price list.")
+        parser.add_argument("--orders", type=int, default=500)
+        parser.add_argument("--items", type=int, default=5,
+                            help="Items per order.")
+        parser.add_argument("--page-size", type=int, default=200)
+        parser.add_argument("--requests", type=int, default=50,
+                            help="Requests per measurement.")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                override_settings(**LIST_BENCHMARK_SETTINGS):
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                _, customer = create_benchmark_data(
+                    Path(tmp_dir), options["goods"], options["orders"], options["items"]
+                )
+                client = APIClient()
+                client.force_authenticate(user=customer)
+                self._run(client, options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+    def _run(self, client, options):
+        page_size = options["page_size"]
+        endpoints = (
+            ("products", f"/api/products/?page_size={page_size}"),
+            ("orders", f"/api/orders/?page_size={page_size}"),
+        )
+
+        self.stdout.write(
+            f"{'endpoint':>10} "
+            + " ".join(f"{name + ', rps':>17}" for name, _ in MODES)
+            + f" {'speedup':>8}"
+        )
+        for name, url in endpoints:
+            rps = {}
+            for mode, projections in MODES:
+                with override_settings(API_LIST_PROJECTIONS=projections):
+                    # прогрев: первые запросы компилируют шаблоны SQL и т. п.
+                    client.get(url)
+                    started = time.perf_counter()
+                    for _ in range(options["requests"]):
+                        response = client.get(url)
+                        assert response.status_code == 200, response.content
+                    rps[mode] = options["requests"] / (time.perf_counter() - started)
+
+            self.stdout.write(
+                f"{name:>10} "
+                + " ".join(f"{rps[mode]:>17.1f}" for mode, _ in MODES)
+                + f" {rps['projections'] / rps['serializers']:>7.1f}x"
+            )
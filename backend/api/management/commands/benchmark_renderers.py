@@ -0,0 +1,103 @@
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from orders.models import Order
+from orders.serializers import SupplierOrderDetailSerializer
+from products.models import Product
+from products.serializers import ProductSerializer
+
+from api.benchmark import BENCHMARK_SETTINGS, create_benchmark_data
+from api.renderers import UJSONRenderer, ujson
+
+
+RENDERERS = (("drf", JSONRenderer), ("ujson", UJSONRenderer))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares DRF's JSONRenderer and UJSONRenderer on ProductSerializer and "
+        "SupplierOrderDetailSerializer pages built in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--goods", type=int, default=1_000,
+                            help="Number of goods in the generated price list.")
+        parser.add_argument("--orders", type=int, default=200)
+        parser.add_argument("--items", type=int, default=5,
+                            help="Items per order.")
+        parser.add_argument("--page-size", type=int, default=200,
+                            help="Objects per rendered payload.")
+        parser.add_argument("--number", type=int, default=50,
+                            help="Renders per measurement.")
+        parser.add_argument("--repeat", type=int, default=5,
+                            help="Measurements per renderer, the best one is reported.")
+
+    def handle(self, *args, **options):
+        if ujson is None:
+            self.stderr.write("ujson is not installed: UJSONRenderer falls back to DRF")
+
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                override_settings(**BENCHMARK_SETTINGS):
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                payloads = self._payloads(Path(tmp_dir), options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+        self.stdout.write(
+            f"{'payload':>16} {'KB':>8} "
+            + " ".join(f"{name + ', ms':>10}" for name, _ in RENDERERS)
+            + f" {'speedup':>8}"
+        )
+        for name, data in payloads.items():
+            outputs = {key: renderer().render(data) for key, renderer in RENDERERS}
+            # оба рендерера должны отдавать один и тот же JSON
+            assert json.loads(outputs["drf"]) == json.loads(outputs["ujson"])
+
+            timings = {
+                key: self._measure(renderer(), data, options) for key, renderer in RENDERERS
+            }
+            self.stdout.write(
+                f"{name:>16} {len(outputs['drf']) / 1024:>8.1f} "
+                + " ".join(f"{timings[key]:>10.3f}" for key, _ in RENDERERS)
+                + f" {timings['drf'] / timings['ujson']:>7.1f}x"
+            )
+
+    def _measure(self, renderer, data, options):
+        best = None
+        for _ in range(options["repeat"]):
+            started = time.perf_counter()
+            for _ in range(options["number"]):
+                renderer.render(data)
+            elapsed = (time.perf_counter() - started) / options["number"] * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def _payloads(self, work_dir, options):
+        supplier, _ = create_benchmark_data(
+            work_dir, options["goods"], options["orders"], options["items"]
+        )
+
+        request = Request(APIRequestFactory().get("/api/products/"))
+        request.user = supplier
+        page = options["page_size"]
+        return {
+            "products": ProductSerializer(
+                Product.objects.for_catalog().order_by("id")[:page],
+                many=True,
+                context={"request": request},
+            ).data,
+            "supplier_orders": SupplierOrderDetailSerializer(
+                Order.objects.select_related("user", "contact").order_by("-id")[:page],
+                many=True,
+                context={"request": request},
+            ).data,
+        }
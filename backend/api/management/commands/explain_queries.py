@@ -0,0 +1,151 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory
+
+from api import views
+from orders.models import Order, OrderItem
+from products.models import Product
+from shops.models import Shop
+
+
+# признаки полного прохода по таблице в плане запроса
+FULL_SCAN = {
+    # SQLite: "SCAN orders_order" без USING INDEX (SEARCH — это поиск по индексу)
+    "sqlite": re.compile(r"\bSCAN (?!.*\bUSING\b.*\bINDEX\b)(?!.*\bPRIMARY KEY\b)(\w+)"),
+    "postgresql": re.compile(r"\bSeq Scan on (\w+)"),
+}
+
+# сортировка без подходящего индекса
+TEMP_SORT = {
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR (ORDER BY|DISTINCT|GROUP BY)"),
+    "postgresql": re.compile(r"^\s*(?:->\s*)?Sort\b", re.MULTILINE),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN on the main queries of the API views and flags full table "
+        "scans. Run it against a seeded database (and with --analyze on SQLite "
+        "after loading data) to check index coverage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customer", help="Email of the customer to build queries for.")
+        parser.add_argument("--supplier", help="Email of the supplier to build queries for.")
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Collect planner statistics (ANALYZE) before explaining.",
+        )
+        parser.add_argument(
+            "--fail-on-scan",
+            action="store_true",
+            help="Exit with an error if any query does a full table scan.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in FULL_SCAN:
+            raise CommandError(f"EXPLAIN audit is not supported on {connection.vendor}")
+
+        customer = self._user(options["customer"], Order.objects.values("user_id"))
+        supplier = self._user(options["supplier"], Shop.objects.values("user_id"))
+
+        if options["analyze"]:
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        scans = 0
+        for name, queryset in self._queries(customer, supplier):
+            plan = queryset.explain()
+            full_scans = sorted(set(FULL_SCAN[connection.vendor].findall(plan)))
+            temp_sort = TEMP_SORT[connection.vendor].search(plan)
+            scans += bool(full_scans)
+
+            if full_scans:
+                header = self.style.ERROR(f"FULL SCAN {name}: {', '.join(full_scans)}")
+            elif temp_sort:
+                header = self.style.WARNING(f"SORT      {name}")
+            else:
+                header = self.style.SUCCESS(f"OK        {name}")
+
+            self.stdout.write(header)
+            for line in plan.splitlines():
+                self.stdout.write(f"    {line}")
+
+        self.stdout.write(f"{scans} queries with full table scans")
+        if scans and options["fail_on_scan"]:
+            raise CommandError("Some queries do full table scans")
+
+    def _user(self, email, candidates):
+        User = get_user_model()
+        if email:
+            user = User.objects.filter(email=email).first()
+            if not user:
+                raise CommandError(f"User '{email}' not found")
+            return user
+        # по умолчанию — любой пользователь с заказами / магазином
+        return User.objects.filter(id__in=candidates).first() or User(id=0)
+
+    def _view_queryset(self, view_class, user, params=None, **kwargs):
+        # основной запрос списка так, как его строит view и курсорная пагинация
+        # на глубокой странице: WHERE <ключ> > курсор ORDER BY <ключ> LIMIT
+        request = Request(APIRequestFactory().get("/", params or {}))
+        request.user = user
+        view = view_class(request=request, kwargs=kwargs, format_kwarg=None)
+        queryset = view.get_queryset()
+
+        paginator = view.paginator
+        if paginator is None:
+            return queryset
+
+        ordering = paginator.ordering
+        ordering = (ordering,) if isinstance(ordering, str) else ordering
+        field = ordering[0].lstrip("-")
+        cursor = queryset.order_by(*ordering).values_list(field, flat=True).first()
+        if cursor is not None:
+            lookup = "lt" if ordering[0].startswith("-") else "gt"
+            queryset = queryset.filter(**{f"{field}__{lookup}": cursor})
+        return queryset.order_by(*ordering)[:api_settings.PAGE_SIZE + 1]
+
+    def _queries(self, customer, supplier):
+        category_id = Product.objects.values_list("category_id", flat=True).first() or 0
+        shop = Shop.objects.filter(user=supplier).first() or Shop(id=0, name="")
+        order_id = Order.objects.exclude(status="cart").values_list("id", flat=True).first() or 0
+        product = Product.objects.first() or Product(id=0, name="", category_id=0)
+
+        return [
+            ("ProductListView", self._view_queryset(views.ProductListView, customer)),
+            ("ProductListView ?category",
+             self._view_queryset(views.ProductListView, customer, {"category": category_id})),
+            ("ProductListView ?shop",
+             self._view_queryset(views.ProductListView, customer, {"shop": shop.id})),
+            # карточка читает готовый документ каталога, как и view
+            ("ProductDetailView", views.ProductDetailView.queryset.filter(pk=product.id)),
+            ("CartView", Order.objects.filter(user=customer, status="cart")),
+            ("CartItemDeleteView", OrderItem.objects.filter(
+                id=0, order__user=customer, order__status="cart",
+            )),
+            ("OrderConfirmView", Order.objects.filter(user=customer, status="new")
+             .order_by("-created_at")[:1]),
+            ("OrderListView", self._view_queryset(views.OrderListView, customer)),
+            ("OrderView", self._view_queryset(views.OrderView, customer, pk=order_id)),
+            ("SupplierOrderListView",
+             self._view_queryset(views.SupplierOrderListView, supplier)),
+            ("SupplierOrderStatusView", OrderItem.objects.filter(
+                order_id=order_id, product_info__shop__user=supplier,
+            ).exclude(order__status="cart")),
+            ("SupplierOrderStatusView close order",
+             OrderItem.objects.filter(order_id=order_id).exclude(status="done")),
+            ("SupplierOrderDetailSerializer items", OrderItem.objects.filter(
+                order_id=order_id, product_info__shop__name=shop.name,
+            )),
+            ("SupplierAcceptionView", Shop.objects.filter(user=supplier)[:1]),
+            ("Importer products lookup", Product.objects.filter(
+                name__in=[product.name], category_id__in=[product.category_id],
+            )),
+        ]
@@ -0,0 +1,26 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CatalogCursorPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация по возрастанию первичного ключа.
+
+    Следующая страница выбирается условием WHERE pk > <курсор>, поэтому глубокие страницы стоят столько же, сколько первая.
+    Размер страницы — ?page_size=, но не больше API_MAX_PAGE_SIZE.
+    """
+    ordering = 'pk'
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        # представление может выбрать порядок по запросу (?ordering=price в списке товаров)
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering:
+            return ordering
+        return super().get_ordering(request, queryset, view)
+
+
+class OrderCursorPagination(CatalogCursorPagination):
+    """Курсорная пагинация заказов: сначала новые (по индексу created_at)."""
+    ordering = '-created_at'
@@ -1,10 +1,41 @@
 
 # Create your tests here.
 
+import csv
+import gzip
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+from uuid import UUID
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 
+from importer import jobs as import_jobs
+from orders.models import Order, OrderItem
+from orders.projections import ORDER_VALUES, order_list
+from products.models import CatalogEntry, Parameter, Product, ProductInfo, ProductParameter
+from products.projections import catalog_entries, catalog_values
+from products.serializers import ProductSerializer
+from products.catalog import rebuild_catalog, refresh_entries
+from products.facets import rebuild_facets
+from products.search import rebuild_index
+from products import versions
+from shops.models import Category, Shop
+
+from .renderers import UJSONParser, UJSONRenderer
+
 
 User = get_user_model()
 
@@ -33,3 +64,643 @@ class UserThrottlingTestCase(APITestCase):
         # 6-й запрос должен быть заблокирован
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class ImportQueueFailureTestCase(APITestCase):
+    def test_unqueued_job_is_failed(self):
+        cache.clear()
+        supplier = User.objects.create_user(
+            username="queue_supplier", email="queue@test.com", password="12345678",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=supplier)
+
+        with mock.patch("api.views.run_import_job.delay", side_effect=OSError("broker")), \
+                mock.patch("api.views.import_jobs.fail_job", wraps=import_jobs.fail_job) as fail, \
+                self.assertLogs("api.views", "ERROR"):
+            response = self.client.post("/api/import/", {"file_path": __file__})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        job_id = fail.call_args.args[0]
+        self.assertEqual(import_jobs.get_job(job_id)["status"], "failed")
+
+
+# silk пишет каждый запрос в свои таблицы — считаем только запросы приложения
+@override_settings(
+    CACHALOT_ENABLED=False,
+    MIDDLEWARE=[m for m in settings.MIDDLEWARE if not m.startswith("silk.")],
+)
+class CatalogQueryBudgetTestCase(APITestCase):
+    """
+    Число SQL-запросов каталога не должно зависеть от числа товаров.
+
+    Бюджет: одна строка документа каталога (CatalogEntry) на товар.
+    """
+
+    QUERY_BUDGET = 1
+
+    def setUp(self):
+        # кэш ORM и счётчики throttling не должны влиять на число запросов
+        cache.clear()
+        self.supplier = User.objects.create_user(
+            username="budget_supplier",
+            email="budget@test.com",
+            password="12345678",
+        )
+
+    def _create_catalog(self, products, shops=2, parameters=3):
+        batch = Category.objects.count()
+        category = Category.objects.create(name=f"Категория {batch}")
+        shop_list = [
+            Shop.objects.create(name=f"Магазин {batch}-{index}", user=self.supplier)
+            for index in range(shops)
+        ]
+        names = [
+            Parameter.objects.get_or_create(name=f"Параметр {index}")[0]
+            for index in range(parameters)
+        ]
+
+        for index in range(products):
+            product = Product.objects.create(
+                name=f"Товар {batch}-{index}", category=category
+            )
+            for shop in shop_list:
+                info = ProductInfo.objects.create(
+                    product=product, shop=shop, quantity=1, price=100, price_rrc=120
+                )
+                ProductParameter.objects.bulk_create(
+                    ProductParameter(product_info=info, parameter=name, value="1")
+                    for name in names
+                )
+        # версии каталога меняются после коммита — иначе ответ придёт из кэша
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_catalog()
+        return product
+
+    def test_product_list_query_budget(self):
+        for products in (1, 20):
+            self._create_catalog(products)
+            with self.assertNumQueries(self.QUERY_BUDGET):
+                response = self.client.get("/api/products/")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_product_list_filtered_query_budget(self):
+        product = self._create_catalog(20)
+        shop = product.product_infos.first().shop
+
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get(
+                "/api/products/",
+                {"shop": shop.id, "category": product.category_id},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 20)
+
+    def test_product_list_facet_filter_query_budget(self):
+        self._create_catalog(20)
+        self._create_catalog(5, parameters=1)
+        rebuild_facets()
+
+        # +1 запрос на поиск фасетов по именам и значениям
+        with self.assertNumQueries(self.QUERY_BUDGET + 1):
+            response = self.client.get(
+                "/api/products/", {"param[Параметр 0]": "1", "param[Параметр 2]": "1"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 20)
+
+    def test_product_list_deep_page_query_budget(self):
+        self._create_catalog(20)
+        url, seen = "/api/products/?page_size=5", []
+
+        while url:
+            with self.assertNumQueries(self.QUERY_BUDGET):
+                response = self.client.get(url)
+            seen.extend(product["id"] for product in response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(seen, sorted(Product.objects.values_list("id", flat=True)))
+
+    def test_product_list_cache_invalidated_by_refresh(self):
+        product = self._create_catalog(3)
+        shop = product.product_infos.first().shop
+        url = f"/api/products/?shop={shop.id}"
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        # импорт меняет цену и пересобирает документ товара
+        ProductInfo.objects.filter(product=product, shop=shop).update(price=90)
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_entries([product.id], shop_ids=[shop.id])
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        offers = {
+            offer["shop"]: offer["price"]
+            for offer in response.data["results"][-1]["product_infos"]
+        }
+        self.assertEqual(offers[shop.name], "90.00")
+
+        admin = User.objects.create_user(
+            username="cache_admin", email="cache@test.com", password="12345678",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=admin)
+        stats = self.client.get("/api/cache/stats/").data
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_product_detail_query_budget(self):
+        for shops in (1, 10):
+            product = self._create_catalog(1, shops=shops)
+            with self.assertNumQueries(self.QUERY_BUDGET):
+                response = self.client.get(f"/api/products/{product.id}/")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data["product_infos"]), shops)
+
+
+@override_settings(CACHALOT_ENABLED=False)
+class ProductSearchTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        supplier = User.objects.create_user(
+            username="search_supplier",
+            email="search@test.com",
+            password="12345678",
+        )
+        shop = Shop.objects.create(name="Связной", user=supplier)
+        phones = Category.objects.create(name="Смартфоны")
+        cases = Category.objects.create(name="Аксессуары")
+        color = Parameter.objects.create(name="Цвет")
+
+        for name, category, value in (
+            ("Apple iPhone XR", phones, "красный"),
+            ("Samsung Galaxy S20", phones, "черный"),
+            ("Чехол для Apple iPhone", cases, "красный"),
+            ("Красный кабель USB", cases, "белый"),
+        ):
+            product = Product.objects.create(name=name, category=category)
+            info = ProductInfo.objects.create(
+                product=product, shop=shop, quantity=1, price=100, price_rrc=120
+            )
+            ProductParameter.objects.create(
+                product_info=info, parameter=color, value=value
+            )
+        rebuild_index()
+        rebuild_catalog()
+
+    def _search(self, query):
+        response = self.client.get("/api/products/search/", {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [product["name"] for product in response.data["results"]]
+
+    def test_prefix_search_across_fields(self):
+        self.assertEqual(self._search("galax"), ["Samsung Galaxy S20"])
+        self.assertEqual(self._search("смартф черн"), ["Samsung Galaxy S20"])
+
+    def test_name_match_ranks_above_parameters(self):
+        # "красный" у двух товаров в параметрах, у кабеля — в названии
+        self.assertEqual(self._search("красн")[0], "Красный кабель USB")
+        self.assertEqual(len(self._search("красн")), 3)
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self._search('"iphone" OR *'), [])
+
+    def test_unsupported_database(self):
+        with mock.patch("products.search.is_supported", return_value=False):
+            response = self.client.get("/api/products/search/", {"q": "galaxy"})
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertEqual(response.data, {"error": "search is not supported"})
+
+
+@override_settings(
+    CACHALOT_ENABLED=False,
+    MIDDLEWARE=[m for m in settings.MIDDLEWARE if not m.startswith("silk.")],
+)
+class ConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create_user(
+            username="etag_customer", email="etag@test.com", password="12345678"
+        )
+        supplier = User.objects.create_user(
+            username="etag_supplier", email="supplier@test.com", password="12345678"
+        )
+        shop = Shop.objects.create(name="Связной", user=supplier)
+        product = Product.objects.create(
+            name="Apple iPhone XR", category=Category.objects.create(name="Смартфоны")
+        )
+        self.offer = ProductInfo.objects.create(
+            product=product, shop=shop, quantity=5, price=100, price_rrc=120
+        )
+        rebuild_catalog()
+
+    def test_product_list_not_modified(self):
+        response = self.client.get("/api/products/")
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_entries([self.offer.product_id])
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "shop.example"])
+    def test_origin_is_part_of_etag_and_cache_key(self):
+        responses = [
+            self.client.get("/api/products/"),
+            self.client.get("/api/products/", secure=True),
+            self.client.get("/api/products/", HTTP_HOST="shop.example"),
+        ]
+        self.assertEqual([r["X-Cache"] for r in responses], ["MISS"] * 3)
+        self.assertEqual(len({r["ETag"] for r in responses}), 3)
+
+    def test_unknown_ids_do_not_create_version_keys(self):
+        self.client.get("/api/products/", {"shop": 1000})
+        self.client.get("/api/products/999999/")
+        self.assertEqual(
+            cache.get_many([
+                versions.SHOP_VERSION_KEY.format(1000),
+                versions.PRODUCT_VERSION_KEY.format(999999),
+            ]),
+            {},
+        )
+
+        # версия товара появляется после его изменения и меняет ETag карточки
+        url = f"/api/products/{self.offer.product_id}/"
+        etag = self.client.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_entries([self.offer.product_id])
+        self.assertNotEqual(self.client.get(url)["ETag"], etag)
+
+    def test_order_list_not_modified_until_order_changes(self):
+        order = Order.objects.create(user=self.customer, status="new")
+        OrderItem.objects.create(order=order, product_info=self.offer, quantity=1)
+        self.client.force_authenticate(user=self.customer)
+
+        etag = self.client.get("/api/orders/")["ETag"]
+        # проверка валидатора — только чтение версий из кэша
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/orders/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # цены в заказе зафиксированы: изменения каталога валидатор не меняют
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_entries([self.offer.product_id])
+        response = self.client.get("/api/orders/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        contact = {
+            "city": "Москва", "street": "Тверская", "house": "1", "phone": "+79990000000",
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/order/confirm/", {"contact": contact}, format="json")
+        response = self.client.get("/api/orders/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["status"], "confirmed")
+
+
+class UJSONRendererTestCase(APITestCase):
+    def test_output_matches_drf_renderer(self):
+        data = {
+            "id": 1,
+            "name": "Смартфон Apple iPhone XR 256 GB (красный)\u2028",
+            "price": Decimal("110000.50"),
+            "created_at": datetime(2026, 10, 18, 12, 30, tzinfo=timezone.utc),
+            "uuid": UUID("12345678-1234-5678-1234-567812345678"),
+            "offers": [{"shop": "Связной", "quantity": 14, "parameters": []}],
+            "url": "http://testserver/media/products/1.jpg",
+        }
+        self.assertEqual(UJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_parser_rejects_non_finite_numbers(self):
+        parser = UJSONParser()
+        self.assertEqual(
+            parser.parse(BytesIO('{"name": "Чехол NaN"}'.encode())), {"name": "Чехол NaN"}
+        )
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{"quantity": NaN}'))
+
+
+class ListProjectionTestCase(APITestCase):
+    """Списки без сериализаторов отдают те же байты, что и через сериализаторы."""
+
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create_user(
+            username="projection_customer", email="projection@test.com", password="12345678"
+        )
+        supplier = User.objects.create_user(
+            username="projection_supplier", email="supplier@test.com", password="12345678"
+        )
+        shops = [
+            Shop.objects.create(name=f"Магазин {index}", user=supplier) for index in range(2)
+        ]
+        category = Category.objects.create(name="Смартфоны")
+        color = Parameter.objects.create(name="Цвет")
+
+        self.offers = []
+        for index in range(3):
+            product = Product.objects.create(
+                name=f"Смартфон {index}",
+                category=category,
+                image=f"products/phone_{index}.jpg" if index else "",
+                # у последнего товара миниатюра уже готова
+                thumbnails=(
+                    {"product_preview": f"products/phone_{index}.jpg.300x300_q85_crop.jpg"}
+                    if index == 2 else {}
+                ),
+            )
+            for shop in shops:
+                info = ProductInfo.objects.create(
+                    product=product, shop=shop, quantity=index,
+                    price=Decimal("999.99") + index, price_rrc=1200,
+                )
+                ProductParameter.objects.create(
+                    product_info=info, parameter=color, value="черный"
+                )
+                self.offers.append(info)
+        rebuild_catalog()
+
+    def _both_paths(self, url):
+        contents = []
+        for projections in (False, True):
+            # ответ не должен прийти из кэша первого запроса
+            cache.clear()
+            with self.settings(API_LIST_PROJECTIONS=projections):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            contents.append(response.content)
+        return contents
+
+    def test_product_list_matches_serializer(self):
+        # URL изображений собираются без обращений к хранилищу
+        with mock.patch.object(FileSystemStorage, "url", side_effect=AssertionError), \
+                mock.patch.object(FileSystemStorage, "exists", side_effect=AssertionError):
+            serialized, projected = self._both_paths("/api/products/?page_size=3")
+        self.assertEqual(projected, serialized)
+        products = json.loads(projected)["results"]
+        self.assertIsNone(products[0]["image_preview"])
+        self.assertEqual(
+            products[2]["image_preview"],
+            "http://testserver/media/products/phone_2.jpg.300x300_q85_crop.jpg",
+        )
+
+        # и формат ProductSerializer, по которому строится документ каталога
+        request = self.client.get("/api/products/").wsgi_request
+        products = ProductSerializer(
+            Product.objects.for_catalog().order_by("id"), many=True,
+            context={"request": request},
+        ).data
+        self.assertEqual(
+            JSONRenderer().render(catalog_entries(
+                CatalogEntry.objects.order_by("pk").values(*catalog_values()), request
+            )),
+            JSONRenderer().render(products),
+        )
+
+    def test_sparse_fieldsets(self):
+        serialized, projected = self._both_paths(
+            "/api/products/?fields=id,name&expand=product_infos"
+        )
+        self.assertEqual(projected, serialized)
+        product = json.loads(projected)["results"][0]
+        self.assertEqual(list(product), ["id", "name", "product_infos"])
+        self.assertNotIn("parameters", product["product_infos"][0])
+
+        # без предложений документ offers не читается из базы
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/products/", {"fields": "id,name"})
+        self.assertEqual(list(response.data["results"][0]), ["id", "name"])
+        catalog_queries = [
+            query["sql"] for query in queries
+            # silk пишет текст запросов в свои таблицы — их пропускаем
+            if query["sql"].startswith("SELECT") and "products_catalogentry" in query["sql"]
+        ]
+        self.assertEqual(len(catalog_queries), 1)
+        self.assertNotIn("offers", catalog_queries[0])
+
+        # предложения без параметров — без столбца offer_parameters
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/products/", {"expand": "product_infos"})
+        catalog_queries = [
+            query["sql"] for query in queries
+            if query["sql"].startswith("SELECT") and "products_catalogentry" in query["sql"]
+        ]
+        self.assertIn("offers", catalog_queries[0])
+        self.assertNotIn("offer_parameters", catalog_queries[0])
+
+        response = self.client.get("/api/products/", {"expand": "offers"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_best_offer_ordering_and_filters(self):
+        # у товара 0 нет остатка: лучшая цена — среди всех предложений
+        totals = CatalogEntry.objects.order_by("pk").values_list(
+            "min_price", "total_quantity", "shops_count"
+        )
+        self.assertEqual(list(totals), [
+            (Decimal("999.99"), 0, 2),
+            (Decimal("1000.99"), 2, 2),
+            (Decimal("1001.99"), 4, 2),
+        ])
+
+        response = self.client.get(
+            "/api/products/", {"ordering": "-price", "in_stock": 1, "page_size": 1}
+        )
+        self.assertEqual([p["name"] for p in response.data["results"]], ["Смартфон 2"])
+        response = self.client.get(response.data["next"])
+        self.assertEqual([p["name"] for p in response.data["results"]], ["Смартфон 1"])
+        self.assertIsNone(response.data["next"])
+
+        response = self.client.get("/api/products/", {"max_price": "1000.99", "fields": "name"})
+        self.assertEqual(
+            response.data["results"], [{"name": "Смартфон 0"}, {"name": "Смартфон 1"}]
+        )
+
+        response = self.client.get("/api/products/", {"min_price": "дёшево"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_facets_apply_offer_filters_and_cache(self):
+        rebuild_facets()
+        response = self.client.get("/api/products/facets/")
+        self.assertEqual(response.data["facets"], {"Цвет": [{"value": "черный", "count": 3}]})
+
+        # у товара 0 нет остатка
+        response = self.client.get("/api/products/facets/", {"in_stock": 1})
+        self.assertEqual(response.data["facets"], {"Цвет": [{"value": "черный", "count": 2}]})
+        self.assertEqual(response["X-Cache"], "MISS")
+        response = self.client.get("/api/products/facets/", {"in_stock": 1})
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        response = self.client.get("/api/products/facets/", {"max_price": "дёшево"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_catalog_export_streams_list_format(self):
+        response = self.client.get("/api/products/export/", {"type": "jsonl"})
+        self.assertTrue(response.streaming)
+        exported = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        listed = json.loads(self.client.get("/api/products/", {
+            "fields": "id,name,category", "expand": "product_infos.parameters",
+        }).content)["results"]
+        self.assertEqual(exported, listed)
+
+        response = self.client.get(
+            "/api/products/export/", {"type": "csv", "compress": "gzip"}, HTTP_ACCEPT="text/csv"
+        )
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        rows = list(csv.reader(
+            gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+        ))
+        # заголовок + по строке на каждое из шести предложений
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[1][:3], [str(self.offers[0].product_id), "Смартфон 0", "Смартфоны"])
+        self.assertEqual(rows[1][-1], "Цвет: черный")
+
+    def test_order_list_matches_serializer(self):
+        for index, status_ in enumerate(("new", "confirmed", "done")):
+            order = Order.objects.create(user=self.customer, status=status_)
+            for offer in self.offers[index:index + 3]:
+                OrderItem.objects.create(order=order, product_info=offer, quantity=index + 1)
+        Order.objects.create(user=self.customer, status="new")
+        Order.objects.filter(user=self.customer).update_totals()
+        self.client.force_authenticate(user=self.customer)
+
+        serialized, projected = self._both_paths("/api/orders/?page_size=3")
+        self.assertEqual(projected, serialized)
+
+
+class OrderTotalsTestCase(APITestCase):
+    """Цены позиций фиксируются, сумма заказа хранится в заказе."""
+
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create_user(
+            username="totals_customer", email="totals@test.com", password="12345678"
+        )
+        supplier = User.objects.create_user(
+            username="totals_supplier", email="supplier@test.com", password="12345678"
+        )
+        shop = Shop.objects.create(name="Связной", user=supplier)
+        product = Product.objects.create(
+            name="Apple iPhone XR", category=Category.objects.create(name="Смартфоны")
+        )
+        self.offer = ProductInfo.objects.create(
+            product=product, shop=shop, quantity=5, price=100, price_rrc=120
+        )
+        self.client.force_authenticate(user=self.customer)
+
+    def test_closed_shop_leaves_cart_unchanged(self):
+        self.client.post("/api/cart/", {"product_info": self.offer.id, "quantity": 1})
+        Shop.objects.update(is_accepting_orders=False)
+
+        response = self.client.post("/api/cart/", {"product_info": self.offer.id, "quantity": 2})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        cart = Order.objects.get(user=self.customer, status="cart")
+        self.assertEqual(cart.items.get().quantity, 1)
+        self.assertEqual(cart.total, Decimal("100"))
+
+    def _reprice(self, price):
+        ProductInfo.objects.filter(id=self.offer.id).update(price=price)
+
+    def test_prices_are_fixed_at_confirmation(self):
+        for _ in range(2):
+            self.client.post("/api/cart/", {"product_info": self.offer.id, "quantity": 2})
+        cart = Order.objects.get(user=self.customer, status="cart")
+        self.assertEqual(cart.total, Decimal("400"))
+
+        # до подтверждения цена ещё может измениться
+        self._reprice(150)
+        self.client.post("/api/order/create/")
+        contact = {
+            "city": "Москва", "street": "Тверская", "house": "1", "phone": "+79990000000",
+        }
+        self.client.post("/api/order/confirm/", {"contact": contact}, format="json")
+
+        # после подтверждения — нет
+        self._reprice(999)
+        with CaptureQueriesContext(connection) as queries:
+            order = order_list(Order.objects.filter(id=cart.id).values(*ORDER_VALUES))[0]
+        self.assertEqual(order["total_price"], "600.00")
+        # заказы страницы и их позиции, без агрегатов по суммам
+        # (silk дописывает EXPLAIN — их пропускаем)
+        selects = [query["sql"] for query in queries if query["sql"].startswith("SELECT")]
+        self.assertEqual(len(selects), 2)
+        self.assertFalse(any("SUM(" in sql for sql in selects))
+        self.assertEqual(OrderItem.objects.get(order=cart).price, Decimal("150"))
+
+
+@override_settings(
+    CACHALOT_ENABLED=False,
+    MIDDLEWARE=[m for m in settings.MIDDLEWARE if not m.startswith("silk.")],
+)
+class CartBatchTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create_user(
+            username="batch_customer", email="batch@test.com", password="12345678"
+        )
+        supplier = User.objects.create_user(
+            username="batch_supplier", email="supplier@test.com", password="12345678"
+        )
+        shop = Shop.objects.create(name="Связной", user=supplier)
+        category = Category.objects.create(name="Смартфоны")
+        self.offers = [
+            ProductInfo.objects.create(
+                product=Product.objects.create(name=f"Смартфон {index}", category=category),
+                shop=shop, quantity=5, price=100 * (index + 1), price_rrc=120,
+            )
+            for index in range(4)
+        ]
+        self.cart = Order.objects.create(user=self.customer, status="cart")
+        for offer in self.offers[:2]:
+            OrderItem.objects.create(order=self.cart, product_info=offer, quantity=1, status="cart")
+        self.client.force_authenticate(user=self.customer)
+
+    def _quantities(self):
+        return dict(self.cart.items.values_list("product_info_id", "quantity"))
+
+    def test_batch_applies_all_lines_in_one_request(self):
+        first, second, third, fourth = (offer.id for offer in self.offers)
+        items = [
+            {"product_info": first, "quantity": 2},
+            {"product_info": first, "quantity": 1},
+            {"product_info": second, "action": "remove"},
+            {"product_info": third, "action": "set", "quantity": 3},
+            {"product_info": fourth, "quantity": 1},
+            {"product_info": fourth, "action": "set", "quantity": 0},
+        ]
+        # число запросов не зависит от числа строк: проверка предложений,
+        # корзина, текущие позиции, upsert, DELETE, пересчёт суммы, ответ
+        with self.assertNumQueries(10):
+            response = self.client.post("/api/cart/batch/", {"items": items}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._quantities(), {first: 4, third: 3})
+        self.assertEqual(response.data["total_price"], "1300.00")
+
+    def test_invalid_line_leaves_cart_unchanged(self):
+        Shop.objects.update(is_accepting_orders=False)
+        response = self.client.post("/api/cart/batch/", {"items": [
+            {"product_info": self.offers[2].id, "quantity": 1},
+            {"product_info": self.offers[0].id, "action": "remove"},
+        ]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post("/api/cart/batch/", {"items": [
+            {"product_info": self.offers[0].id, "action": "remove"},
+            {"product_info": 0, "quantity": 1},
+        ]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._quantities(), {self.offers[0].id: 1, self.offers[1].id: 1})
@@ -1,16 +1,21 @@
 from django.urls import path
-from .views import (CartView, ImportProductsView, OrderListView, 
-                    ProductListView, OrderCreateView, OrderConfirmView, 
+from .views import (CartBatchView, CartView, ImportProductsView, OrderListView, 
+                    ImportJobStatusView, ProductListView, OrderCreateView, OrderConfirmView, 
                     OrderView, RegisterView, LoginView, PasswordResetAPIView,
                     ContactView, ContactDetailView, CartItemDeleteView,
-                    ProductDetailView, SupplierOrderListView,
+                    ProductDetailView, ProductExportView, ProductFacetsView, ProductSearchView,
+                    SupplierOrderListView, CacheStatsView,
                     SupplierAcceptionView, SupplierOrderStatusView, SentryTestErrorView)
 from django.contrib.auth import views as auth_views
 
 
 urlpatterns = [
     path('import/', ImportProductsView.as_view()),
+    path('import/<uuid:job_id>/', ImportJobStatusView.as_view()),
     path('products/', ProductListView.as_view()),
+    path('products/search/', ProductSearchView.as_view()),
+    path('products/facets/', ProductFacetsView.as_view()),
+    path('products/export/', ProductExportView.as_view()),
     path('products/<int:pk>/', ProductDetailView.as_view()),
     path('login/', LoginView.as_view()),
     path('register/', RegisterView.as_view()),
@@ -26,6 +31,7 @@ urlpatterns = [
         name='password_reset_complete',
     ),
     path('cart/', CartView.as_view()),
+    path('cart/batch/', CartBatchView.as_view()),
     path('cart/<int:item_id>/', CartItemDeleteView.as_view()),
     path('orders/', OrderListView.as_view()),
     path('order/create/', OrderCreateView.as_view()),
@@ -36,6 +42,7 @@ urlpatterns = [
     path('supplier/orders/', SupplierOrderListView.as_view()),
     path('supplier/orders/<int:pk>/status/', SupplierOrderStatusView.as_view()),
     path('supplier/acception/', SupplierAcceptionView.as_view()),
+    path('cache/stats/', CacheStatsView.as_view()),
     path('sentry-debug/', SentryTestErrorView.as_view()),
 ]
 
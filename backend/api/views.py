@@ -1,3 +1,10 @@
+import logging
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
 from django.contrib.auth.forms import PasswordResetForm
@@ -5,17 +12,26 @@ from django.contrib.auth.forms import PasswordResetForm
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.generics import ListAPIView, RetrieveAPIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.views import APIView
 
 from contacts.models import Contact
 from contacts.serializers import ContactSerializer
 
-from importer.services import import_products_from_yaml
+from importer import jobs as import_jobs
+from importer.services import SYNC_MODES
+from importer.tasks import run_import_job
+from importer.uploads import PriceListUploadHandler
 
+from orders import versions as order_versions
+from orders.cart import apply_batch
 from orders.models import Order, OrderItem
+from orders.projections import ORDER_VALUES, order_list
 from orders.serializers import (
+    CartBatchSerializer,
     OrderConfirmSerializer,
     OrderItemSerializer,
     OrderListSerializer,
@@ -26,76 +42,334 @@ from orders.serializers import (
 )
 from orders.tasks import send_order_confirmation_email, send_order_to_admin
 
-from products.models import Product
-from products.serializers import ProductDetailSerializer, ProductSerializer
+from products import versions
+from products.models import CatalogEntry, ProductInfo
+from products.catalog import parse_offer_filters
+from products.facets import facet_counts, filter_by_facets, parse_facet_filters
+from products.projections import catalog_entries, catalog_values, parse_fieldset
+from products.search import search_products
+from products.serializers import CatalogEntryDetailSerializer, CatalogEntrySerializer
 
 from shops.models import Shop
 
 from accounts.serializers import LoginSerializer, RegisterSerializer
 
+from .cache import CachedResponseMixin, ConditionalGetMixin, cache_stats
+from .export import EXPORT_TYPES, export_stream
+from .pagination import OrderCursorPagination
 from .permissions import IsSupplier
 
 
+logger = logging.getLogger(__name__)
+
+
 class ImportProductsView(APIView):
     """
     Импорт товаров поставщиком из YAML-файла.
 
     Доступно только аутентифицированным пользователям с ролью поставщика.
-    Принимает путь к файлу и обновляет ассортимент магазина пользователя.
+    Принимает путь к файлу на сервере (file_path), список путей (file_paths)
+    или сам файл в multipart-поле file (можно несколько, можно gzip)
+    и ставит импорт в очередь Celery, сразу возвращая id задачи
+    для опроса статуса. Файлы пакета импортируются параллельно.
+    sync=zero|delete — обнулить или удалить предложения магазина,
+    которых нет в новом прайсе.
     """
     permission_classes = [IsAuthenticated, IsSupplier]
 
     def post(self, request):
+        # загружаемый файл пишется на диск по частям, а не копится в памяти
+        request._request.upload_handlers = [
+            PriceListUploadHandler(request._request)
+        ]
+
+        uploads = request.FILES.getlist("file")
         file_path = request.data.get("file_path")
+        file_paths = request.data.get("file_paths")
+        sync = request.data.get("sync") or None
+
+        if sync not in SYNC_MODES:
+            for upload in uploads:
+                upload.discard()
+            return Response({"error": "sync must be zero or delete"}, status=400)
+
+        if uploads:
+            is_batch = len(uploads) > 1
+            # (путь к файлу, имя для отчёта, удалить после импорта)
+            sources = [
+                (upload.temporary_file_path(), upload.name, True)
+                for upload in uploads
+            ]
+        elif file_paths is not None:
+            is_batch = True
+            if not isinstance(file_paths, list) or not file_paths:
+                return Response(
+                    {"error": "file_paths must be a non-empty list"}, status=400
+                )
+            sources = [(path, path, False) for path in file_paths]
+        elif file_path:
+            is_batch = False
+            sources = [(file_path, file_path, False)]
+        else:
+            return Response({"error": "file_path or file is required"}, status=400)
 
-        if not file_path:
-            return Response({"error": "file_path is required"}, status=400)
+        missing = [path for path, _, _ in sources if not os.path.isfile(path)]
+        if missing:
+            return Response({"error": "file not found", "files": missing}, status=400)
 
+        queued = []
+        created = []
         try:
-            result = import_products_from_yaml(
-                file_path=file_path,
-                user=request.user,
+            for path, name, uploaded in sources:
+                job = import_jobs.create_job(request.user.id, file=name)
+                created.append(job["id"])
+                run_import_job.delay(
+                    job["id"], path, request.user.id, uploaded, sync=sync
+                )
+                queued.append(job["id"])
+        except Exception:
+            logger.exception("Failed to queue import jobs")
+            # и задача, которую не удалось поставить, не должна остаться queued
+            for job_id in created:
+                import_jobs.fail_job(job_id, "import queue is unavailable")
+            for upload in uploads[len(queued):]:
+                upload.discard()
+            return Response({"error": "import queue is unavailable"}, status=503)
+
+        if not is_batch:
+            return Response(
+                {"status": "import queued", "job_id": queued[0]},
+                status=status.HTTP_202_ACCEPTED,
             )
-        except ValueError as e:
-            return Response({"error": str(e)}, status=400)
 
-        return Response(result, status=200)
+        batch = import_jobs.create_batch(request.user.id, queued)
+        return Response(
+            {"status": "import queued", "job_id": batch["id"], "jobs": queued},
+            status=status.HTTP_202_ACCEPTED,
+        )
 
 
-class ProductListView(ListAPIView):
+class ImportJobStatusView(APIView):
+    """
+    Статус задачи импорта.
+
+    Возвращает этап, число обработанных товаров, скорость (товаров/сек)
+    и итог импорта или ошибку; для пакета — отчёт по каждому файлу.
+    Данные читаются из кэша, а не из БД.
+    Требует роль поставщика.
+    """
+    permission_classes = [IsAuthenticated, IsSupplier]
+    throttle_scope = "import_status"
+    throttle_classes = [ScopedRateThrottle]
+
+    def get(self, request, job_id):
+        job = import_jobs.get_job(str(job_id))
+
+        if not job or job["user_id"] != request.user.id:
+            return Response({"error": "Import job not found"}, status=404)
+
+        if "jobs" in job:
+            return Response(import_jobs.batch_status(job))
+
+        data = {key: value for key, value in job.items() if key != "user_id"}
+        return Response(data)
+
+
+class ProductListView(CachedResponseMixin, ListAPIView):
     """
     Публичный список товаров.
 
-    Поддерживает фильтрацию по магазину и категории через query-параметры.
+    Поддерживает фильтрацию по магазину и категории через query-параметры,
+    а также по значениям параметров: ?param[Цвет]=черный.
+    ?fields=id,name и ?expand=product_infos[.parameters] — только нужные поля.
+    ?min_price=, ?max_price=, ?in_stock=1 и ?ordering=price|-price — по лучшему
+    предложению товара (индексированные агрегаты CatalogEntry).
+    Читает готовые документы каталога (CatalogEntry) — одна строка на товар,
+    и собирает ответ без сериализатора (products/projections.py).
+    Ответ кэшируется до изменения каталога (или магазина при ?shop=).
     """
-    serializer_class = ProductSerializer
+    serializer_class = CatalogEntrySerializer
     permission_classes = [AllowAny]
+    # условия и порядок из запроса (parse_offer_filters)
+    offer_filters = {}
+    cursor_ordering = None
+
+    def list(self, request, *args, **kwargs):
+        try:
+            self.fields, self.parameters = parse_fieldset(request.query_params)
+            self.offer_filters, self.cursor_ordering = parse_offer_filters(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        # читаются только столбцы выбранных полей (и цена — для курсора по ней)
+        columns = catalog_values(self.fields, self.parameters)
+        if self.cursor_ordering:
+            columns = (*columns, "min_price")
+        queryset = self.filter_queryset(self.get_queryset())
+        if not settings.API_LIST_PROJECTIONS:
+            page = self.paginate_queryset(queryset.only(*columns))
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        queryset = queryset.values(*columns)
+        page = self.paginate_queryset(queryset)
+        entries = catalog_entries(page, request, self.fields, self.parameters)
+        return self.get_paginated_response(entries)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context.update(fields=self.fields, parameters=self.parameters)
+        return context
+
+    def data_versions(self, request, *args, **kwargs):
+        shop_id = request.query_params.get("shop")
+        if shop_id:
+            return [versions.shop_version(shop_id)]
+        return [versions.catalog_version()]
 
     def get_queryset(self):
-        qs = Product.objects.all()
+        return self.filter_products(CatalogEntry.objects.filter(**self.offer_filters))
 
+    def filter_products(self, qs):
         shop_id = self.request.query_params.get("shop")
         category_id = self.request.query_params.get("category")
 
         if shop_id:
-            qs = qs.filter(product_infos__shop_id=shop_id)
+            # подзапрос вместо join: не нужен DISTINCT по всей выборке
+            qs = qs.filter(
+                pk__in=ProductInfo.objects.filter(shop_id=shop_id).values("product_id")
+            )
 
         if category_id:
             qs = qs.filter(category_id=category_id)
 
-        return qs.distinct()
+        return filter_by_facets(qs, parse_facet_filters(self.request.query_params))
+
+
+class ProductFacetsView(ProductListView):
+    """
+    Фасеты текущей выборки товаров.
+
+    Принимает те же фильтры, что и список товаров (включая ?min_price=,
+    ?max_price= и ?in_stock=1), и возвращает для каждого параметра значения
+    с числом подходящих товаров. Кэшируется так же, как список.
+    """
+
+    def list(self, request, *args, **kwargs):
+        try:
+            self.offer_filters, _ = parse_offer_filters(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+        return Response({"facets": facet_counts(self.get_queryset())})
+
+
+class ProductSearchView(CachedResponseMixin, APIView):
+    """
+    Полнотекстовый поиск товаров.
+
+    Ищет по названию товара, категории и значениям параметров (?q=),
+    каждое слово запроса — префикс. Результаты отсортированы по
+    релевантности, ?limit= — сколько вернуть (не больше API_MAX_PAGE_SIZE),
+    ?fields= и ?expand= — как в списке товаров.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "q is required"}, status=400)
+
+        try:
+            limit = int(request.query_params.get("limit", api_settings.PAGE_SIZE))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+        limit = max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+        try:
+            fields, parameters = parse_fieldset(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        try:
+            product_ids = search_products(query, limit)
+        except NotImplementedError:
+            # индекса для этой СУБД нет (products/search.py)
+            return Response({"error": "search is not supported"}, status=501)
+        rows = {
+            row["pk"]: row
+            for row in CatalogEntry.objects.filter(pk__in=product_ids).values(
+                *catalog_values(fields, parameters)
+            )
+        }
+
+        # порядок — по релевантности из индекса
+        results = catalog_entries(
+            [rows[product_id] for product_id in product_ids if product_id in rows],
+            request, fields, parameters,
+        )
+        return Response({"query": query, "results": results})
+
 
+class ProductExportView(APIView):
+    """
+    Выгрузка всего каталога для партнёров.
 
-class ProductDetailView(RetrieveAPIView):
+    ?type=csv — строка на предложение, ?type=jsonl — строка на товар
+    в формате списка товаров; ?compress=gzip — сжатый файл.
+    Ответ отдаётся потоком (api/export.py): память не зависит
+    от размера каталога.
+    """
+    permission_classes = [AllowAny]
+
+    def perform_content_negotiation(self, request, force=False):
+        # Accept: text/csv не должен давать 406 — формат задаёт ?type=
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request):
+        export_type = request.query_params.get("type", "csv")
+        if export_type not in EXPORT_TYPES:
+            return Response(
+                {"error": f"type must be one of: {', '.join(EXPORT_TYPES)}"}, status=400
+            )
+        compress = request.query_params.get("compress", "")
+        if compress not in ("", "gzip"):
+            return Response({"error": "compress must be gzip"}, status=400)
+
+        content_type, extension = EXPORT_TYPES[export_type]
+        filename = f"catalog.{extension}"
+        if compress:
+            content_type, filename = "application/gzip", f"{filename}.gz"
+
+        response = StreamingHttpResponse(
+            export_stream(export_type, compress=bool(compress)), content_type=content_type
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ProductDetailView(CachedResponseMixin, RetrieveAPIView):
     """
     Публичные детали товара.
 
-    Возвращает подробную информацию о конкретном товаре.
+    Возвращает подробную информацию о конкретном товаре
+    из документа каталога (CatalogEntry). Ответ кэшируется
+    до изменения товара.
     """
-    queryset = Product.objects.all()
-    serializer_class = ProductDetailSerializer
+    queryset = CatalogEntry.objects.all()
+    serializer_class = CatalogEntryDetailSerializer
     permission_classes = [AllowAny]
 
+    def data_versions(self, request, *args, **kwargs):
+        return [versions.product_version(kwargs["pk"])]
+
+
+class CacheStatsView(APIView):
+    """Попадания и промахи кэша ответов каталога (для администраторов)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())
+
 
 class CartView(APIView):
     """
@@ -112,35 +386,64 @@ class CartView(APIView):
         serializer = OrderListSerializer(cart)
         return Response(serializer.data)
 
+    @transaction.atomic
     def post(self, request):
         cart, _ = Order.objects.get_or_create(user=request.user, status="cart")
 
         serializer = OrderItemSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        product_info = serializer.validated_data["product_info"]
+
+        # магазин проверяется до записи позиции: ранний ответ не откатывает транзакцию
+        if not product_info.shop.is_accepting_orders:
+            return Response(
+                {"error": "This shop is not accepting orders at the moment"},
+                status=400,
+            )
+
+        # цена фиксируется при добавлении товара в корзину
         item, created = OrderItem.objects.get_or_create(
             order=cart,
-            product_info=serializer.validated_data["product_info"],
+            product_info=product_info,
             defaults={"quantity": serializer.validated_data["quantity"],
+                      "price": product_info.price,
                       "status": "cart"
                       },
         )
 
-        supplier_shop = item.product_info.shop
-
-        if not supplier_shop.is_accepting_orders:
-            return Response(
-                {"error": "This shop is not accepting orders at the moment"},
-                status=400,
-            )
-
         if not created:
             item.quantity += serializer.validated_data["quantity"]
             item.save()
 
+        Order.objects.filter(id=cart.id).update_totals()
         return Response({"status": "item added"})
 
 
+class CartBatchView(APIView):
+    """
+    Пакетное изменение корзины.
+
+    Принимает строки {"product_info", "action": add|set|remove, "quantity"}
+    и применяет их одним запросом: предложения проверяются одним SELECT,
+    изменения — upsert'ом и DELETE в одной транзакции (orders/cart.py).
+    Если хоть одна строка не прошла проверку, корзина не меняется.
+    Возвращает корзину. Требует авторизации.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @transaction.atomic
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        cart, _ = Order.objects.get_or_create(user=request.user, status="cart")
+        apply_batch(cart, serializer.validated_data["items"], serializer.validated_data["prices"])
+
+        cart.refresh_from_db(fields=["total"])
+        return Response(OrderListSerializer(cart).data)
+
+
 class CartItemDeleteView(APIView):
     """
     Удаление позиции из корзины.
@@ -150,6 +453,7 @@ class CartItemDeleteView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @transaction.atomic
     def delete(self, request, item_id):
         try:
             item = OrderItem.objects.get(
@@ -161,6 +465,7 @@ class CartItemDeleteView(APIView):
             return Response({"error": "Item not found in cart"}, status=404)
 
         item.delete()
+        Order.objects.filter(id=item.order_id).update_totals()
         return Response({"status": "item deleted"})
 
 
@@ -181,6 +486,7 @@ class OrderCreateView(APIView):
 
         cart.status = "new"
         cart.save()
+        order_versions.bump_orders([cart.id])
 
         return Response({"status": "Order created"})
 
@@ -228,46 +534,74 @@ class OrderConfirmView(APIView):
                     status=400,
                 )
 
-        order.contact = contact
-        order.status = "confirmed"
-        order.save()
+        with transaction.atomic():
+            order.contact = contact
+            order.status = "confirmed"
+            order.save()
 
-        # Подтверждаем позиции
-        order.items.update(status="confirmed")
+            # Подтверждаем позиции по текущим ценам предложений:
+            # дальше цены и сумма заказа не меняются
+            order.items.update(status="confirmed", price=Subquery(
+                ProductInfo.objects.filter(pk=OuterRef("product_info_id")).values("price")[:1]
+            ))
+            Order.objects.filter(id=order.id).update_totals()
+        order_versions.bump_orders([order.id])
 
         # Уведомления
         try:
             send_order_confirmation_email.delay(order.id)
             send_order_to_admin.delay(order.id)
-        except Exception as e:
-            print("Celery error:", e)
+        except Exception:
+            logger.exception("Failed to queue order %s notifications", order.id)
 
         return Response({"status": "order confirmed"})
 
 
-class OrderListView(ListAPIView):
+class OrderListView(ConditionalGetMixin, ListAPIView):
     """
     Список заказов пользователя.
 
-    Возвращает все заказы пользователя, кроме корзины.
+    Возвращает все заказы пользователя, кроме корзины; ответ собирается
+    без сериализатора (orders/projections.py).
+    Поддерживает условный GET (ETag / Last-Modified).
     Требует авторизации.
     """
     serializer_class = OrderListSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OrderCursorPagination
+    private_response = True
+
+    def data_versions(self, request, *args, **kwargs):
+        return order_versions.customer_versions(request.user.id)
+
+    def list(self, request, *args, **kwargs):
+        if not settings.API_LIST_PROJECTIONS:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).values(*ORDER_VALUES)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(order_list(queryset))
+        return self.get_paginated_response(order_list(page))
 
     def get_queryset(self):
         return Order.objects.filter(user=self.request.user).exclude(status="cart")
 
 
-class OrderView(RetrieveAPIView):
+class OrderView(ConditionalGetMixin, RetrieveAPIView):
     """
     Детали заказа пользователя.
 
     Возвращает подробную информацию по одному заказу.
+    Поддерживает условный GET (ETag / Last-Modified).
     Требует авторизации.
     """
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    private_response = True
+
+    def data_versions(self, request, *args, **kwargs):
+        return order_versions.customer_versions(request.user.id)
 
     def get_queryset(self):
         return (
@@ -384,6 +718,8 @@ class ContactDetailView(APIView):
         serializer = ContactSerializer(contact, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        # контакт доставки виден поставщикам в их списке заказов
+        order_versions.bump_orders(contact.orders.values_list("id", flat=True))
 
         return Response({"status": "contact updated"})
 
@@ -397,24 +733,33 @@ class ContactDetailView(APIView):
         return Response({"status": "contact deleted"})
 
 
-class SupplierOrderListView(ListAPIView):
+class SupplierOrderListView(ConditionalGetMixin, ListAPIView):
     """
     Список заказов поставщика.
 
     Возвращает заказы, содержащие товары магазинов текущего поставщика.
+    Поддерживает условный GET (ETag / Last-Modified).
     Требует роль поставщика.
     """
     serializer_class = SupplierOrderDetailSerializer
     permission_classes = [IsAuthenticated, IsSupplier]
+    pagination_class = OrderCursorPagination
+    private_response = True
+
+    def data_versions(self, request, *args, **kwargs):
+        return order_versions.supplier_versions(request.user.id)
 
     def get_queryset(self):
         # ВАЖНО: фильтруем по shop.user, а не по имени магазина
         return (
-            Order.objects.filter(items__product_info__shop__user=self.request.user)
+            Order.objects.filter(
+                id__in=OrderItem.objects.filter(
+                    product_info__shop__user=self.request.user
+                ).values("order_id")
+            )
             .exclude(status="cart")
             .select_related("user", "contact")
             .prefetch_related("items__product_info__product", "items__product_info__shop")
-            .distinct()
             .order_by("-created_at")
         )
 
@@ -509,6 +854,7 @@ class SupplierOrderStatusView(APIView):
         if order and not order.items.exclude(status="done").exists():
             order.status = "done"
             order.save()
+        order_versions.bump_orders([pk])
 
         return Response(
             {
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from celery.schedules import crontab
 import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
 
@@ -102,6 +103,12 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # импорт идёт из нескольких процессов: транзакция сразу берёт
+            # блокировку на запись и ждёт её, а не падает с "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -156,15 +163,40 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # JSON на ujson (api/renderers.py), без ujson — стандартные классы DRF
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.UJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.UJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.UserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'user': '5/min',
+        'import_status': '60/min',
     },
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # курсорная пагинация всех списков (api/pagination.py), заказы — по created_at
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CatalogCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
+# максимальный размер страницы, который можно запросить через ?page_size=
+API_MAX_PAGE_SIZE = 200
+
+# Сколько хранится закэшированный ответ каталога (секунды). Устаревшие
+# ответы отсекает версия каталога в ключе, срок лишь чистит старые версии
+API_RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# списки товаров и заказов собираются из .values() без сериализаторов
+# (products/projections.py, orders/projections.py); False — через сериализаторы
+API_LIST_PROJECTIONS = True
+
 AUTH_USER_MODEL = 'accounts.User'
 
 AUTHENTICATION_BACKENDS = (
@@ -184,6 +216,13 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
+CELERY_BEAT_SCHEDULE = {
+    'cleanup-orphaned-catalog': {
+        'task': 'products.tasks.cleanup_orphaned_catalog',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
+
 CACHES = {
     'default': {
         'BACKEND': 'django_redis.cache.RedisCache',
@@ -206,6 +245,10 @@ SOCIAL_AUTH_GITHUB_SECRET = 'GITHUB_CLIENT_SECRET'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Куда пишутся прайс-листы, загруженные через POST /api/import/.
+# Каталог должен быть общим для web-процессов и воркеров Celery.
+IMPORT_UPLOAD_DIR = BASE_DIR / 'imports'
+
 THUMBNAIL_ALIASES = {
     '': {
         'avatar': {'size': (100, 100), 'crop': True},
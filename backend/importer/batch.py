@@ -0,0 +1,117 @@
+"""
+Параллельный импорт нескольких прайс-листов.
+
+Каждый файл импортируется в отдельном процессе пула; внутри процесса
+импорт идёт пачками в коротких транзакциях (см. ProductImporter.import_goods),
+поэтому медленный поставщик не держит блокировку за остальных.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connections
+
+from shops.models import Shop
+
+from .parser import open_price_list
+from .services import IMPORT_CHUNK_SIZE, import_products_from_yaml
+
+
+def _init_worker():
+    # при spawn (macOS, Windows) Django в дочернем процессе не настроен,
+    # при fork — забываем унаследованные от родителя соединения с БД:
+    # close() отправил бы серверу завершение сессии, которой пользуется
+    # родитель, поэтому процесс пула просто открывает свои
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    django.setup()
+    for connection in connections.all(initialized_only=True):
+        connection.connection = None
+
+
+def _owner_of(file_path):
+    """Владелец магазина, название которого указано в прайсе."""
+    with open_price_list(file_path) as reader:
+        shop_name = reader.shop
+
+    shop = Shop.objects.filter(name=shop_name).select_related("user").first()
+    if not shop:
+        raise ValueError(f"Shop '{shop_name}' not found, specify the importing user")
+    return shop.user
+
+
+def import_file(file_path, user_id=None, chunk_size=IMPORT_CHUNK_SIZE, sync=None):
+    """
+    Импортирует один файл и возвращает строку отчёта.
+
+    Без user_id файл импортируется от имени владельца магазина из прайса.
+    """
+    started = time.perf_counter()
+    report = {"file": str(file_path), "status": "done", "error": None}
+
+    try:
+        if user_id is None:
+            user = _owner_of(file_path)
+        else:
+            user = get_user_model().objects.get(id=user_id)
+
+        result = import_products_from_yaml(
+            file_path, user, chunk_size=chunk_size, sync=sync
+        )
+    except (ValueError, OSError) as e:
+        report.update(status="failed", error=str(e))
+    except Exception as e:
+        report.update(status="failed", error=f"{type(e).__name__}: {e}")
+    else:
+        report.update(shop=result["shop"], rows=result["rows"])
+
+    seconds = time.perf_counter() - started
+    goods = report.get("rows", {}).get("goods", 0)
+    report["seconds"] = round(seconds, 3)
+    report["throughput"] = round(goods / seconds, 1) if seconds > 0 else 0.0
+    return report
+
+
+def import_price_lists(file_paths, workers=None, user_id=None,
+                       chunk_size=IMPORT_CHUNK_SIZE, on_report=None, sync=None):
+    """
+    Импортирует файлы в пуле из workers процессов.
+
+    Возвращает отчёт по каждому файлу (в порядке file_paths) и итоги.
+    on_report(report) вызывается по мере завершения файлов.
+    """
+    started = time.perf_counter()
+    reports = {}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {
+            pool.submit(import_file, path, user_id, chunk_size, sync): path
+            for path in file_paths
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                report = future.result()
+            except Exception as e:
+                # упал сам процесс пула (например, убит по OOM)
+                report = {"file": str(path), "status": "failed",
+                          "error": f"{type(e).__name__}: {e}"}
+            reports[path] = report
+            if on_report is not None:
+                on_report(report)
+
+    files = [reports[path] for path in file_paths]
+    seconds = time.perf_counter() - started
+    goods = sum(report.get("rows", {}).get("goods", 0) for report in files)
+
+    return {
+        "files": files,
+        "total": {
+            "files": len(files),
+            "failed": sum(report["status"] == "failed" for report in files),
+            "goods": goods,
+            "seconds": round(seconds, 3),
+            "throughput": round(goods / seconds, 1) if seconds > 0 else 0.0,
+        },
+    }
@@ -0,0 +1,119 @@
+"""
+Генератор синтетических прайс-листов в формате shop / categories / goods.
+
+Используется для нагрузочных замеров импорта. Товары детерминированы
+по seed, а revision позволяет получить «следующую выгрузку» того же
+поставщика, где изменена только доля changed товаров — для замеров
+дельта-импорта. Модуль не зависит от Django.
+"""
+import gzip
+import json
+import random
+
+
+CATEGORY_NAMES = [
+    "Смартфоны", "Аксессуары", "Flash-накопители", "Телевизоры", "Ноутбуки",
+    "Планшеты", "Наушники", "Мониторы", "Фотоаппараты", "Умные часы",
+]
+
+BRANDS = ["Apple", "Samsung", "Xiaomi", "Sony", "LG", "Huawei", "Asus", "Lenovo"]
+
+# параметр -> варианты значений
+PARAMETERS = {
+    "Диагональ (дюйм)": [5.5, 5.8, 6.1, 6.5, 6.7, 13.3, 15.6, 43, 55, 65],
+    "Разрешение (пикс)": ["1920x1080", "2688x1242", "1792x828", "3840x2160", "2560x1440"],
+    "Встроенная память (Гб)": [16, 32, 64, 128, 256, 512, 1024],
+    "Цвет": ["черный", "белый", "красный", "синий", "золотистый", "серебристый", "зеленый"],
+    "Оперативная память (Гб)": [2, 4, 6, 8, 12, 16, 32],
+    "Вес (г)": [150, 174, 194, 208, 226, 1200, 1800, 2100],
+    "Гарантия (мес)": [6, 12, 24, 36],
+    "Интерфейс": ["USB 2.0", "USB 3.0", "USB 3.1", "USB-C", "Lightning"],
+    "Страна производства": ["Китай", "Вьетнам", "Корея", "Индия", "Тайвань"],
+    "Тип матрицы": ["IPS", "OLED", "AMOLED", "VA", "TN"],
+}
+
+
+def _parameter_pool(parameters):
+    # при parameters больше встроенного списка добавляем синтетические
+    names = list(PARAMETERS)[:parameters]
+    pool = {name: PARAMETERS[name] for name in names}
+    for index in range(len(names), parameters):
+        pool[f"Параметр {index + 1}"] = [f"значение {value}" for value in range(1, 21)]
+    return pool
+
+
+def _category_name(index):
+    base = CATEGORY_NAMES[index % len(CATEGORY_NAMES)]
+    return base if index < len(CATEGORY_NAMES) else f"{base} {index // len(CATEGORY_NAMES) + 1}"
+
+
+def _good(good_id, categories, pool, parameters_per_good, seed, revision, changed):
+    rnd = random.Random(seed * 1_000_003 + good_id)
+    brand = rnd.choice(BRANDS)
+    line = rnd.randint(1, 50)
+    category = rnd.randint(1, categories)
+    price = rnd.randrange(500, 300_000, 10)
+    quantity = rnd.randint(0, 100)
+
+    names = rnd.sample(list(pool), min(parameters_per_good, len(pool)))
+    parameters = {name: rnd.choice(pool[name]) for name in names}
+
+    # доля changed товаров меняется в каждой следующей ревизии выгрузки
+    for rev in range(1, revision + 1):
+        change = random.Random(f"{seed}:{rev}:{good_id}")
+        if change.random() < changed:
+            price = max(10, price + change.randrange(-5000, 5000, 10))
+            quantity = change.randint(0, 100)
+
+    return {
+        "id": good_id,
+        "category": category,
+        "model": f"{brand.lower()}/line-{line}/{good_id}",
+        "name": f"{_category_name(category - 1)} {brand} Line {line} #{good_id}",
+        "price": price,
+        "price_rrc": price + rnd.randrange(0, 5000, 10),
+        "quantity": quantity,
+        "parameters": parameters,
+    }
+
+
+def _scalar(value):
+    # строки в JSON-кавычках — это корректные YAML-скаляры в двойных кавычках
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, str) else str(value)
+
+
+def generate_price_list(path, goods, categories=10, parameters=6,
+                        parameters_per_good=4, shop="Benchmark", seed=0,
+                        revision=0, changed=0.05, compress=False):
+    """
+    Пишет прайс-лист с goods товарами в path.
+
+    categories и parameters задают кардинальность справочников,
+    parameters_per_good — сколько параметров у каждого товара.
+    """
+    pool = _parameter_pool(parameters)
+    opener = gzip.open if compress else open
+
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.write(f"shop: {_scalar(shop)}\ncategories:\n")
+        for category_id in range(1, categories + 1):
+            f.write(
+                f"  - id: {category_id}\n"
+                f"    name: {_scalar(_category_name(category_id - 1))}\n"
+            )
+
+        f.write("goods:\n")
+        for good_id in range(1, goods + 1):
+            good = _good(good_id, categories, pool, parameters_per_good,
+                         seed, revision, changed)
+            lines = [f"  - id: {good['id']}"]
+            lines.extend(
+                f"    {key}: {_scalar(good[key])}"
+                for key in ("category", "model", "name", "price", "price_rrc", "quantity")
+            )
+            lines.append("    parameters:")
+            lines.extend(
+                f"      {_scalar(name)}: {_scalar(value)}"
+                for name, value in good["parameters"].items()
+            )
+            f.write("\n".join(lines) + "\n")
@@ -0,0 +1,134 @@
+"""
+Состояние фоновых задач импорта.
+
+Состояние хранится в кэше (Redis из CACHES), а не в БД: опрос статуса
+не должен нагружать основную базу, а запись прогресса — блокировать импорт.
+"""
+import time
+import uuid
+
+from django.core.cache import cache
+
+
+# Сколько хранится информация о задаче импорта (секунды)
+IMPORT_JOB_TTL = 60 * 60 * 24
+
+JOB_KEY = "importer:job:{}"
+
+
+def _save(job):
+    cache.set(JOB_KEY.format(job["id"]), job, IMPORT_JOB_TTL)
+    return job
+
+
+def create_job(user_id, **extra):
+    """Регистрирует новую задачу импорта в статусе queued."""
+    return _save({
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "status": "queued",
+        "stage": "queued",
+        "rows_processed": 0,
+        "throughput": 0.0,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "result": None,
+        "error": None,
+        **extra,
+    })
+
+
+def create_batch(user_id, job_ids):
+    """Регистрирует пакет задач (по одной на файл) под общим id."""
+    return _save({
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "jobs": list(job_ids),
+        "created_at": time.time(),
+    })
+
+
+def get_job(job_id):
+    return cache.get(JOB_KEY.format(job_id))
+
+
+def get_jobs(job_ids):
+    """Задачи пакета одним чтением из кэша, в исходном порядке."""
+    found = cache.get_many([JOB_KEY.format(job_id) for job_id in job_ids])
+    return [found.get(JOB_KEY.format(job_id)) for job_id in job_ids]
+
+
+def batch_status(batch):
+    """Сводка по пакету: отчёт по каждому файлу и итоги."""
+    files = [job for job in get_jobs(batch["jobs"]) if job is not None]
+    statuses = [job["status"] for job in files]
+
+    if any(status in ("queued", "running") for status in statuses):
+        status = "running"
+    elif "failed" in statuses:
+        status = "failed" if all(s == "failed" for s in statuses) else "partial"
+    else:
+        status = "done"
+
+    return {
+        "id": batch["id"],
+        "status": status,
+        "created_at": batch["created_at"],
+        "files": [
+            {key: value for key, value in job.items() if key != "user_id"}
+            for job in files
+        ],
+        "total": {
+            "files": len(batch["jobs"]),
+            "failed": statuses.count("failed"),
+            "rows_processed": sum(job["rows_processed"] for job in files),
+        },
+    }
+
+
+def update_job(job_id, **fields):
+    job = get_job(job_id)
+    if job is None:
+        return None
+    job.update(fields)
+    return _save(job)
+
+
+def start_job(job_id):
+    return update_job(job_id, status="running", stage="reading", started_at=time.time())
+
+
+def report_progress(job_id, stage, rows_processed):
+    """Обновляет этап, число обработанных товаров и скорость (строк/сек)."""
+    job = get_job(job_id)
+    if job is None:
+        return None
+
+    elapsed = time.time() - (job["started_at"] or job["created_at"])
+    job.update(
+        stage=stage,
+        rows_processed=rows_processed,
+        throughput=round(rows_processed / elapsed, 1) if elapsed > 0 else 0.0,
+    )
+    return _save(job)
+
+
+def finish_job(job_id, result):
+    return update_job(
+        job_id,
+        status="done",
+        stage="done",
+        finished_at=time.time(),
+        result=result,
+    )
+
+
+def fail_job(job_id, error):
+    return update_job(
+        job_id,
+        status="failed",
+        stage="failed",
+        finished_at=time.time(),
+        error=error,
+    )
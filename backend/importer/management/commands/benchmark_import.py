@@ -0,0 +1,163 @@
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from importer.generator import generate_price_list
+from importer.services import IMPORT_CHUNK_SIZE, import_products_from_yaml
+
+
+# Сценарии замера (выполняются по порядку на одной базе):
+# initial — первая загрузка в пустую базу,
+# reimport — та же выгрузка повторно (ничего не изменилось),
+# delta — следующая выгрузка, где изменена доля --changed товаров
+SCENARIOS = ("initial", "reimport", "delta")
+
+# Без Redis и без кэша ORM: замер должен работать на чистой машине
+BENCHMARK_SETTINGS = {
+    "CACHES": {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    },
+    "CACHALOT_ENABLED": False,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks import_products_from_yaml on generated price lists in a "
+        "throwaway SQLite test database and writes the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1_000, 10_000, 50_000],
+            help="Number of goods in generated files.",
+        )
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--parameters", type=int, default=6)
+        parser.add_argument("--parameters-per-good", type=int, default=4)
+        parser.add_argument("--changed", type=float, default=0.05,
+                            help="Share of goods changed in the delta scenario.")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument("--output", default="import_benchmark.json",
+                            help="Where to write the JSON results.")
+        parser.add_argument(
+            "--on-disk",
+            action="store_true",
+            help="Use an SQLite file instead of an in-memory test database.",
+        )
+        parser.add_argument(
+            "--no-memory",
+            action="store_true",
+            help="Skip tracemalloc (it slows imports down noticeably).",
+        )
+
+    def handle(self, *args, **options):
+        results = []
+
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                override_settings(**BENCHMARK_SETTINGS):
+            if options["on_disk"]:
+                connection.settings_dict["TEST"]["NAME"] = str(Path(tmp_dir) / "benchmark.sqlite3")
+
+            for size in options["sizes"]:
+                results.extend(self._run_size(size, Path(tmp_dir), options))
+
+        report = {
+            "environment": {
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "on_disk": options["on_disk"],
+                "chunk_size": options["chunk_size"],
+                "memory_traced": not options["no_memory"],
+            },
+            "results": results,
+        }
+        Path(options["output"]).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _run_size(self, size, work_dir, options):
+        files = {}
+        for scenario, revision in (("initial", 0), ("delta", 1)):
+            files[scenario] = work_dir / f"price_list_{size}_{revision}.yaml"
+            generate_price_list(
+                files[scenario],
+                goods=size,
+                categories=options["categories"],
+                parameters=options["parameters"],
+                parameters_per_good=options["parameters_per_good"],
+                revision=revision,
+                changed=options["changed"],
+            )
+        files["reimport"] = files["initial"]
+
+        # для каждого размера — новая пустая база
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            user = get_user_model().objects.create_user(
+                username="benchmark",
+                email="benchmark@shop.local",
+                password="benchmark",
+                is_staff=True,
+            )
+            results = []
+            for scenario in SCENARIOS:
+                result = self._measure(files[scenario], user, options)
+                result.update(goods=size, scenario=scenario)
+                results.append(result)
+                self.stdout.write(
+                    f"{size:>8} {scenario:>9}: {result['seconds']:>8.2f}s "
+                    f"{result['queries']:>6} queries "
+                    f"{result['rows_per_sec']:>9.0f} rows/s"
+                    + (f" {result['peak_memory_mb']:>7.1f} MB"
+                       if result["peak_memory_mb"] is not None else "")
+                )
+            return results
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def _measure(self, path, user, options):
+        trace_memory = not options["no_memory"]
+        if trace_memory:
+            tracemalloc.start()
+
+        # считаем запросы без сохранения их текста, чтобы не искажать память
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            result = import_products_from_yaml(
+                path, user, chunk_size=options["chunk_size"]
+            )
+        seconds = time.perf_counter() - started
+
+        peak = None
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        return {
+            "seconds": round(seconds, 4),
+            "queries": queries,
+            "peak_memory_mb": round(peak / 1024 / 1024, 2) if peak is not None else None,
+            "rows_per_sec": round(result["rows"]["goods"] / seconds, 1),
+            "rows": result["rows"],
+            "timings": result["timings"],
+        }
@@ -0,0 +1,95 @@
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from importer.generator import generate_price_list
+
+
+# Код, который выполняется в отдельном процессе: так пиковый RSS
+# каждого замера не зависит от предыдущих и от самого Django
+CHILD_SCRIPT = """
+import json, resource, sys, time
+
+loader, path = sys.argv[1:3]
+started = time.perf_counter()
+
+if loader == "safe_load":
+    import yaml
+    with open(path, "rb") as f:
+        goods = len(yaml.safe_load(f)["goods"])
+else:
+    from importer.parser import open_price_list
+    with open_price_list(path) as reader:
+        goods = sum(1 for _ in reader.iter_goods())
+
+print(json.dumps({
+    "goods": goods,
+    "seconds": time.perf_counter() - started,
+    # ru_maxrss в Linux — килобайты, в macOS — байты
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    // (1024 if sys.platform == "darwin" else 1),
+}))
+"""
+
+LOADERS = ("safe_load", "streaming")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares peak RSS and wall time of yaml.safe_load and the streaming "
+        "price-list parser on generated files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[10_000, 100_000, 1_000_000],
+            help="Number of goods in generated files.",
+        )
+        parser.add_argument(
+            "--loaders",
+            nargs="+",
+            choices=LOADERS,
+            default=list(LOADERS),
+        )
+        parser.add_argument(
+            "--dir",
+            help="Directory for generated files (temporary by default).",
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            work_dir = Path(options["dir"] or tmp_dir)
+            work_dir.mkdir(parents=True, exist_ok=True)
+
+            self.stdout.write(
+                f"{'goods':>10} {'loader':>10} {'seconds':>10} {'peak RSS, MB':>13}"
+            )
+            for size in options["sizes"]:
+                path = work_dir / f"price_list_{size}.yaml"
+                if not path.exists():
+                    generate_price_list(path, size)
+
+                for loader in options["loaders"]:
+                    result = self._measure(loader, path)
+                    self.stdout.write(
+                        f"{size:>10} {loader:>10} {result['seconds']:>10.2f} "
+                        f"{result['max_rss_kb'] / 1024:>13.1f}"
+                    )
+
+    def _measure(self, loader, path):
+        completed = subprocess.run(
+            [sys.executable, "-c", CHILD_SCRIPT, loader, str(path)],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return json.loads(completed.stdout)
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from importer.generator import generate_price_list
+
+
+class Command(BaseCommand):
+    help = "Writes a synthetic supplier price list in the shop/categories/goods format."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Output file (.gz is written compressed).")
+        parser.add_argument("--goods", type=int, default=10_000)
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--parameters", type=int, default=6,
+                            help="Number of distinct parameter names.")
+        parser.add_argument("--parameters-per-good", type=int, default=4)
+        parser.add_argument("--shop", default="Benchmark")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--revision",
+            type=int,
+            default=0,
+            help="Re-upload number: each revision changes a share of goods.",
+        )
+        parser.add_argument(
+            "--changed",
+            type=float,
+            default=0.05,
+            help="Share of goods changed in each revision.",
+        )
+
+    def handle(self, *args, **options):
+        generate_price_list(
+            options["path"],
+            goods=options["goods"],
+            categories=options["categories"],
+            parameters=options["parameters"],
+            parameters_per_good=options["parameters_per_good"],
+            shop=options["shop"],
+            seed=options["seed"],
+            revision=options["revision"],
+            changed=options["changed"],
+            compress=options["path"].endswith(".gz"),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['goods']} goods written to {options['path']}"
+        ))
@@ -0,0 +1,80 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from importer.batch import import_price_lists
+from importer.services import IMPORT_CHUNK_SIZE, SYNC_MODES
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports many YAML price lists in parallel. Each file is imported "
+        "by the owner of the shop named in it unless --user is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="Paths to YAML price lists.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of worker processes (CPU count by default).",
+        )
+        parser.add_argument(
+            "--user",
+            help="Email of the user to import all files as.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument(
+            "--sync",
+            choices=[mode for mode in SYNC_MODES if mode],
+            help="Zero out (zero) or delete (delete) shop offers missing "
+                 "from the price list.",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the full report as JSON.",
+        )
+
+    def handle(self, *args, **options):
+        user_id = None
+        if options["user"]:
+            user = get_user_model().objects.filter(email=options["user"]).first()
+            if not user:
+                raise CommandError(f"User '{options['user']}' not found")
+            user_id = user.id
+
+        report = import_price_lists(
+            options["files"],
+            workers=options["workers"],
+            user_id=user_id,
+            chunk_size=options["chunk_size"],
+            sync=options["sync"],
+            on_report=None if options["json"] else self._print_file,
+        )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+
+        total = report["total"]
+        self.stdout.write(
+            f"{total['files']} files, {total['failed']} failed, "
+            f"{total['goods']} goods in {total['seconds']:.2f}s "
+            f"({total['throughput']:.0f} goods/s)"
+        )
+        if total["failed"]:
+            raise CommandError("Some price lists failed to import")
+
+    def _print_file(self, report):
+        if report["status"] == "failed":
+            self.stdout.write(self.style.ERROR(f"FAILED {report['file']}: {report['error']}"))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"OK     {report['file']} ({report['shop']}): "
+            f"{report['rows']['goods']} goods in {report['seconds']:.2f}s "
+            f"({report['throughput']:.0f} goods/s)"
+        ))
@@ -0,0 +1,214 @@
+"""
+Потоковое чтение YAML-прайса поставщика.
+
+Документ разбирается на уровне событий YAML в два прохода: первый
+читает шапку (shop и categories), пропуская goods без сборки объектов,
+второй собирает и отдаёт товары из goods по одному. Поэтому порядок
+ключей верхнего уровня не важен, а память не растёт вместе с размером
+файла.
+
+Модуль не зависит от Django, чтобы его можно было запускать
+в отдельном процессе (см. команду benchmark_yaml_parser).
+"""
+import gzip
+from contextlib import contextmanager
+from functools import partial
+
+import yaml
+from yaml.events import (
+    AliasEvent,
+    DocumentEndEvent,
+    DocumentStartEvent,
+    MappingEndEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+    StreamEndEvent,
+    StreamStartEvent,
+)
+from yaml.nodes import ScalarNode
+
+
+# C-парсер libyaml, если PyYAML собран с ним, иначе чистый Python
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class PriceListReader:
+    """
+    Читатель прайс-листа формата shop / categories / goods.
+
+    open_stream() открывает документ заново (контекстный менеджер с
+    бинарным потоком): после создания доступны shop и categories,
+    товары отдаёт iter_goods() вторым проходом по документу.
+    """
+
+    def __init__(self, open_stream, loader=Loader):
+        self._open_stream = open_stream
+        self._loader = loader
+        self._resolver = yaml.resolver.Resolver()
+        self._constructor = yaml.constructor.SafeConstructor()
+        self._events = None
+        self._anchors = {}
+        self._has_goods = False
+        self._goods_started = False
+
+        self.shop = None
+        self.categories = []
+        with open_stream() as stream:
+            self._events = yaml.parse(stream, Loader=loader)
+            self._read_header()
+        self._events = None
+
+    def iter_goods(self):
+        """Отдаёт товары из goods по одному."""
+        if self._goods_started:
+            raise ValueError("Goods can be read only once")
+        self._goods_started = True
+        if not self._has_goods:
+            return
+
+        with self._open_stream() as stream:
+            self._events = yaml.parse(stream, Loader=self._loader)
+            self._anchors = {}
+            self._read_document_start()
+
+            # ключи кроме goods небольшие: собираем их, чтобы товары
+            # могли ссылаться на якоря из шапки
+            while not isinstance(event := self._next(), MappingEndEvent):
+                if self._construct(event) != "goods":
+                    self._construct(self._next())
+                    continue
+
+                event = self._next()
+                if isinstance(event, SequenceStartEvent):
+                    yield from self._iter_sequence()
+                elif self._construct(event) is not None:
+                    # goods: пустое значение или null
+                    raise ValueError("'goods' must be a list")
+
+            self._read_document_end()
+        self._events = None
+
+    def _iter_sequence(self):
+        # якоря, объявленные внутри товара, живут до конца этого товара:
+        # иначе словарь якорей рос бы со всем документом
+        shared = dict(self._anchors)
+        while not isinstance(event := self._next(), SequenceEndEvent):
+            yield self._construct(event)
+            self._anchors = dict(shared)
+
+    def _read_header(self):
+        self._read_document_start()
+
+        while not isinstance(event := self._next(), MappingEndEvent):
+            key = self._construct(event)
+            if key == "goods":
+                # товары читает второй проход; здесь только пропускаем события
+                self._has_goods = True
+                self._skip(self._next())
+                continue
+            value = self._construct(self._next())
+            if key == "shop":
+                self.shop = value
+            elif key == "categories":
+                self.categories = value or []
+
+        self._read_document_end()
+
+        if self._has_goods and self.shop is None:
+            raise ValueError("YAML must contain 'shop' field")
+
+    def _read_document_start(self):
+        for expected in (StreamStartEvent, DocumentStartEvent, MappingStartEvent):
+            if not isinstance(self._next(), expected):
+                raise ValueError("YAML must be a mapping with shop, categories and goods")
+
+    def _skip(self, event):
+        """Пропускает события текущего узла, не собирая объектов."""
+        depth = 0
+        while True:
+            if isinstance(event, (MappingStartEvent, SequenceStartEvent)):
+                depth += 1
+            elif isinstance(event, (MappingEndEvent, SequenceEndEvent)):
+                depth -= 1
+            if depth == 0:
+                return
+            event = self._next()
+
+    def _read_document_end(self):
+        for expected in (DocumentEndEvent, StreamEndEvent):
+            if not isinstance(self._next(), expected):
+                raise ValueError("YAML must contain a single document")
+
+    def _next(self):
+        try:
+            return next(self._events)
+        except StopIteration:
+            raise ValueError("Unexpected end of YAML document") from None
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML: {e}") from e
+        except (EOFError, gzip.BadGzipFile) as e:
+            raise ValueError(f"Invalid gzip file: {e}") from e
+
+    def _construct(self, event):
+        """Собирает Python-объект из событий текущего узла."""
+        if isinstance(event, AliasEvent):
+            if event.anchor not in self._anchors:
+                raise ValueError(f"Unknown YAML alias '{event.anchor}'")
+            return self._anchors[event.anchor]
+
+        if isinstance(event, ScalarEvent):
+            value = self._construct_scalar(event)
+        elif isinstance(event, SequenceStartEvent):
+            value = []
+            while not isinstance(item := self._next(), SequenceEndEvent):
+                value.append(self._construct(item))
+        elif isinstance(event, MappingStartEvent):
+            value = {}
+            while not isinstance(key := self._next(), MappingEndEvent):
+                value[self._construct(key)] = self._construct(self._next())
+        else:
+            raise ValueError(f"Unexpected YAML event {event!r}")
+
+        if event.anchor is not None:
+            self._anchors[event.anchor] = value
+        return value
+
+    def _construct_scalar(self, event):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = self._resolver.resolve(ScalarNode, event.value, event.implicit)
+
+        node = ScalarNode(tag, event.value, event.start_mark, event.end_mark, event.style)
+        construct = self._constructor.yaml_constructors.get(tag)
+        if construct is None:
+            raise ValueError(f"Unsupported YAML tag '{tag}'")
+        return construct(self._constructor, node)
+
+
+@contextmanager
+def _open_stream(file_path):
+    # сжатые gzip файлы распознаются по сигнатуре и распаковываются на лету
+    with open(file_path, "rb") as raw:
+        is_gzip = raw.read(2) == GZIP_MAGIC
+        raw.seek(0)
+
+        if is_gzip:
+            with gzip.GzipFile(fileobj=raw) as stream:
+                yield stream
+        else:
+            yield raw
+
+
+@contextmanager
+def open_price_list(file_path, loader=Loader):
+    """
+    Открывает файл прайса и возвращает PriceListReader.
+
+    Файл читается дважды (шапка, затем товары), поэтому нужен путь,
+    а не поток.
+    """
+    yield PriceListReader(partial(_open_stream, file_path), loader=loader)
@@ -1,19 +1,78 @@
-import yaml
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from itertools import islice
+
 from django.db import transaction
+from django.utils import timezone
 from shops.models import Shop, Category
 from products.models import Product, ProductInfo, Parameter, ProductParameter
+from products.catalog import refresh_entries
+from products.facets import index_offers
+from products.search import index_products
+from .parser import open_price_list
+
+
+# Сколько товаров из YAML обрабатывается за один проход bulk-операций
+IMPORT_CHUNK_SIZE = 1000
+
+# Что делать с предложениями магазина, которых нет в новом прайсе:
+# None — оставить как есть, zero — обнулить остаток, delete — удалить
+SYNC_MODES = (None, "zero", "delete")
+
+PRICE_QUANT = Decimal("0.01")
+
+
+def _chunked(iterable, size):
+    """Разбивает итерируемый объект на списки длиной не больше size."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _to_price(value):
+    return Decimal(str(value)).quantize(PRICE_QUANT)
+
+
+def _create_names(model, names, batch_size):
+    """
+    Создаёт строки справочника (категории, параметры) с именами names.
+
+    Имя уникально, и параллельный импорт другого магазина может создать
+    ту же строку — такие конфликты игнорируются. Созданными считаются
+    имена, которых не было при повторном чтении прямо перед вставкой;
+    строка, которую параллельный импорт успел вставить между этим чтением
+    и вставкой, тоже попадёт в счётчик — при пакетном импорте он приблизительный.
+    Возвращает (имя -> id, сколько строк создано).
+    """
+    existing = set(model.objects.filter(name__in=names).values_list("name", flat=True))
+    model.objects.bulk_create(
+        [model(name=name) for name in names if name not in existing],
+        ignore_conflicts=True,
+        batch_size=batch_size,
+    )
+    ids = dict(model.objects.filter(name__in=names).values_list("name", "id"))
+    return ids, len(ids.keys() - existing)
+
 
+def content_hash(item, category_id):
+    """
+    Хеш содержимого товара из прайса (всё, кроме внешнего id).
 
-@transaction.atomic
-def import_products_from_yaml(file_path, user):
-    """Импортирует товары из YAML для магазина, привязанного к пользователю."""
+    Категория берётся в виде id из БД, так как yaml id категорий
+    у поставщика могут меняться между выгрузками.
+    """
+    content = {key: value for key, value in item.items() if key != "id"}
+    content["category"] = category_id
+    payload = json.dumps(content, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
 
-    # Читаем YAML
-    with open(file_path, encoding="utf-8") as f:
-        data = yaml.safe_load(f)
 
-    # Название магазина в YAML (обязательное поле)
-    yaml_shop_name = data.get("shop")
+def resolve_shop(user, yaml_shop_name):
+    """Возвращает магазин пользователя, в который разрешён импорт."""
+
     if not yaml_shop_name:
         raise ValueError("YAML must contain 'shop' field")
 
@@ -39,53 +98,538 @@ def import_products_from_yaml(file_path, user):
             f"You can import only your shop '{shop.name}', not '{yaml_shop_name}'"
         )
 
-    # Создаём категории и связываем их с магазином
-    categories_map = {}
-    for category_data in data["categories"]:
-        category, _ = Category.objects.get_or_create(
-            name=category_data["name"]
-        )
-        category.shops.add(shop)
-        categories_map[category_data["id"]] = category
-
-    # Создаём товары + информацию о товаре (цена/количество) для конкретного магазина
-    for item in data["goods"]:
-        category = categories_map.get(item["category"])
-        if not category:
-            continue
-
-        # Создаём товар (общий справочник товаров)
-        product, _ = Product.objects.get_or_create(
-            name=item["name"],
-            category=category,
+    return shop
+
+
+class ProductImporter:
+    """
+    Пакетный импорт прайс-листа в магазин.
+
+    Существующие строки справочников и предложений загружаются в словари
+    один раз на пачку товаров, а запись идёт через bulk_create/bulk_update,
+    поэтому число запросов зависит от числа пачек, а не от числа товаров.
+    """
+
+    def __init__(self, shop, chunk_size=IMPORT_CHUNK_SIZE, progress=None,
+                 sync=None):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"sync must be one of: {', '.join(SYNC_MODES[1:])}")
+
+        self.shop = shop
+        self.chunk_size = chunk_size
+        # progress(stage, rows_processed) вызывается после каждой пачки
+        self.progress = progress
+        self.sync = sync
+        # id предложений, которые есть в файле (нужны только для sync)
+        self.seen_offers = set() if sync else None
+        # товары, уже получившие предложение магазина в этом импорте
+        # (по одному int на товар, как и seen_offers)
+        self.claimed_products = set()
+        # yaml id категории -> id категории в БД
+        self.categories = {}
+        # имя параметра -> id параметра в БД
+        self.parameters = {}
+        self.rows = {
+            "categories_created": 0,
+            "goods": 0,
+            "goods_skipped": 0,
+            "products_created": 0,
+            "offers_created": 0,
+            "offers_updated": 0,
+            "offers_unchanged": 0,
+            "parameters_created": 0,
+            "parameter_values_created": 0,
+            "parameter_values_updated": 0,
+            "parameter_values_unchanged": 0,
+            "parameter_values_removed": 0,
+            "offers_removed": 0,
+            "offers_zeroed": 0,
+        }
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Накапливает время выполнения этапа импорта (в секундах)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (
+                self.timings.get(name, 0.0) + time.perf_counter() - started
+            )
+
+    def import_categories(self, categories):
+        """Создаёт недостающие категории и привязывает их к магазину."""
+        with self.stage("categories"):
+            names = list(dict.fromkeys(category["name"] for category in categories))
+            existing = self._load_categories(names)
+
+            missing = [name for name in names if name not in existing]
+            if missing:
+                created, count = _create_names(Category, missing, self.chunk_size)
+                existing.update(created)
+                self.rows["categories_created"] += count
+
+            Through = Category.shops.through
+            Through.objects.bulk_create(
+                [
+                    Through(category_id=category_id, shop_id=self.shop.id)
+                    for category_id in set(existing.values())
+                ],
+                ignore_conflicts=True,
+                batch_size=self.chunk_size,
+            )
+
+            for category in categories:
+                self.categories[category["id"]] = existing[category["name"]]
+
+        self._report("categories")
+
+    def import_goods(self, goods):
+        """
+        Импортирует товары пачками по chunk_size.
+
+        Каждая пачка — отдельная транзакция: блокировка на запись держится
+        недолго и не мешает импорту других магазинов. Повторный запуск после
+        сбоя безопасен — уже записанные пачки попадут в offers_unchanged.
+        """
+        for chunk in _chunked(self._timed(goods, "read"), self.chunk_size):
+            with transaction.atomic():
+                self._import_chunk(chunk)
+            self._report("goods")
+
+    def result(self):
+        return {
+            "rows": dict(self.rows),
+            "timings": {
+                name: round(seconds, 4) for name, seconds in self.timings.items()
+            },
+        }
+
+    def prune(self):
+        """
+        Убирает предложения магазина, которых не было в файле (режим sync).
+
+        zero — обнуляет остаток, delete — удаляет предложения с параметрами.
+        Предложения, на которые ссылаются позиции заказов, при delete
+        тоже только обнуляются, чтобы не потерять историю заказов.
+        Работает пачками: несколько SQL-операторов на пачку id.
+        """
+        if not self.sync:
+            return
+
+        with self.stage("prune"):
+            stale = [
+                product_info_id
+                for product_info_id in ProductInfo.objects.filter(shop=self.shop)
+                .values_list("id", flat=True)
+                .iterator(chunk_size=self.chunk_size * 10)
+                if product_info_id not in self.seen_offers
+            ]
+
+            for chunk in _chunked(stale, self.chunk_size):
+                with transaction.atomic():
+                    offers = ProductInfo.objects.filter(id__in=chunk)
+                    product_ids = list(offers.values_list("product_id", flat=True))
+
+                    if self.sync == "delete":
+                        _, deleted = offers.filter(orderitem__isnull=True).delete()
+                        self.rows["offers_removed"] += deleted.get(
+                            ProductInfo._meta.label, 0
+                        )
+                        self.rows["parameter_values_removed"] += deleted.get(
+                            ProductParameter._meta.label, 0
+                        )
+                        # товары, оставшиеся без предложений, удалит
+                        # cleanup_orphaned_catalog — только отмеченные здесь
+                        Product.objects.filter(id__in=product_ids).update(
+                            pruned_at=timezone.now()
+                        )
+                        # параметры удалённых предложений уходят из поиска
+                        index_products(product_ids)
+
+                    # хеш сбрасываем, чтобы товар, вернувшийся в прайс с тем же
+                    # содержимым, снова получил остаток
+                    self.rows["offers_zeroed"] += offers.exclude(
+                        quantity=0, content_hash=""
+                    ).update(quantity=0, content_hash="")
+
+                    # остатки и состав предложений в каталоге
+                    refresh_entries(
+                        product_ids, chunk_size=self.chunk_size, shop_ids=[self.shop.id]
+                    )
+
+        self._report("prune")
+
+    def _mark_seen(self, product_info_id):
+        if self.seen_offers is not None:
+            self.seen_offers.add(product_info_id)
+
+    def _report(self, stage):
+        if self.progress is not None:
+            self.progress(stage, self.rows["goods"])
+
+    def _timed(self, iterable, name):
+        # время чтения потока учитывается отдельно от времени записи
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            yield item
+
+    def _load_categories(self, names):
+        return dict(
+            Category.objects.filter(name__in=names).values_list("name", "id")
         )
 
-        # Создаём/обновляем товар в магазине (ProductInfo)
-        product_info, _ = ProductInfo.objects.update_or_create(
-            product=product,
-            shop=shop,
-            defaults={
-                "price": item["price_rrc"],
-                "price_rrc": item["price_rrc"],
+    def _import_chunk(self, chunk):
+        self.rows["goods"] += len(chunk)
+
+        # внешний id поставщика (или имя+категория, если id нет) -> предложение;
+        # повторы внутри пачки схлопываются, последний выигрывает
+        offers = {}
+        for item in chunk:
+            category_id = self.categories.get(item["category"])
+            if not category_id:
+                self.rows["goods_skipped"] += 1
+                continue
+
+            external_id = str(item["id"]) if item.get("id") is not None else None
+            key = (item["name"], category_id)
+            offers[external_id or key] = {
+                "external_id": external_id,
+                "key": key,
+                "model": str(item.get("model") or ""),
+                "price": _to_price(item["price_rrc"]),
+                "price_rrc": _to_price(item["price_rrc"]),
                 "quantity": item["quantity"],
-            },
+                "parameters": {
+                    name: str(value)
+                    for name, value in (item.get("parameters") or {}).items()
+                },
+                "content_hash": content_hash(item, category_id),
+            }
+
+        if not offers:
+            return
+
+        with self.stage("offers"):
+            pending = self._skip_unchanged(offers.values())
+        if not pending:
+            return
+
+        with self.stage("products"):
+            products = self._sync_products([offer["key"] for offer in pending])
+        with self.stage("offers"):
+            written = self._sync_offers(pending, products)
+        with self.stage("parameters"):
+            self._sync_parameters(written)
+        # индекс поиска и документы каталога обновляются в той же транзакции
+        product_ids = [offer["product_id"] for offer in pending]
+        with self.stage("search"):
+            index_products(product_ids)
+        with self.stage("catalog"):
+            refresh_entries(
+                product_ids, chunk_size=self.chunk_size, shop_ids=[self.shop.id]
+            )
+
+    def _skip_unchanged(self, offers):
+        """
+        Отбрасывает предложения, хеш которых совпал с сохранённым.
+
+        Для них не нужны ни поиск товара, ни запись — это основная
+        экономия при повторной загрузке того же прайса.
+        """
+        external_ids = [o["external_id"] for o in offers if o["external_id"]]
+        existing = {
+            row["external_id"]: row
+            for row in ProductInfo.objects.filter(
+                shop=self.shop, external_id__in=external_ids
+            ).values("id", "product_id", "external_id", "content_hash")
+        } if external_ids else {}
+
+        pending = []
+        for offer in offers:
+            row = existing.get(offer["external_id"])
+            if row is not None and row["content_hash"] == offer["content_hash"]:
+                self.rows["offers_unchanged"] += 1
+                self._mark_seen(row["id"])
+                self.claimed_products.add(row["product_id"])
+                continue
+            offer["row"] = row
+            pending.append(offer)
+        return pending
+
+    def _load_products(self, keys):
+        names = {name for name, _ in keys}
+        category_ids = {category_id for _, category_id in keys}
+        loaded = {}
+        rows = (
+            Product.objects.filter(name__in=names, category_id__in=category_ids)
+            .order_by("id")
+            .values_list("name", "category_id", "id")
         )
+        for name, category_id, product_id in rows:
+            loaded.setdefault((name, category_id), product_id)
+        return loaded
+
+    def _sync_products(self, keys):
+        """Возвращает словарь (имя, id категории) -> id товара."""
+        products = self._load_products(keys)
 
-        # Параметры товара (цвет, память, диагональ и т.д.)
-        for param_name, param_value in item.get("parameters", {}).items():
-            parameter, _ = Parameter.objects.get_or_create(
-                name=param_name
+        # порядок создания повторяет порядок товаров в файле; товары с одним
+        # именем и категорией (разные id поставщика) — один товар
+        missing = list(dict.fromkeys(key for key in keys if key not in products))
+        if missing:
+            Product.objects.bulk_create(
+                [
+                    Product(name=name, category_id=category_id)
+                    for name, category_id in missing
+                ],
+                batch_size=self.chunk_size,
             )
+            products.update(self._load_products(missing))
+            self.rows["products_created"] += len(missing)
 
-            ProductParameter.objects.update_or_create(
-                product_info=product_info,
-                parameter=parameter,
-                defaults={"value": str(param_value)},
+        return products
+
+    def _sync_offers(self, offers, products):
+        """
+        Записывает новые и изменённые предложения магазина.
+
+        Возвращает список (id ProductInfo, id товара, параметры предложения).
+        """
+        # на один товар магазина — одно предложение (unique product + shop):
+        # из товаров прайса с одним именем и категорией, но разными id
+        # предложение получает первый, остальные пропускаются — иначе они
+        # по очереди перезаписывали бы одну строку при каждом импорте
+        by_product = {}
+        for offer in offers:
+            offer["product_id"] = products[offer["key"]]
+            if offer["product_id"] in by_product or offer["product_id"] in self.claimed_products:
+                self.rows["goods_skipped"] += 1
+                continue
+            by_product[offer["product_id"]] = offer
+        self.claimed_products.update(by_product)
+
+        current_rows = {
+            row["product_id"]: row
+            for row in ProductInfo.objects.filter(
+                shop=self.shop, product_id__in=by_product.keys()
+            ).values("id", "product_id", "external_id", "content_hash")
+        }
+
+        fields = ["product", "external_id", "model", "price", "price_rrc",
+                  "quantity", "content_hash"]
+        to_release = []
+        to_update = []
+        to_upsert = []
+        written = []
+        for product_id, offer in by_product.items():
+            row = offer["row"]
+            current = current_rows.get(product_id)
+            info = ProductInfo(
+                product_id=product_id,
+                shop=self.shop,
+                external_id=offer["external_id"],
+                model=offer["model"],
+                price=offer["price"],
+                price_rrc=offer["price_rrc"],
+                quantity=offer["quantity"],
+                content_hash=offer["content_hash"],
             )
 
+            if row is None and current is not None and (
+                current["external_id"] == offer["external_id"]
+                and current["content_hash"] == offer["content_hash"]
+            ):
+                # товар без внешнего id, найденный по имени и категории
+                self.rows["offers_unchanged"] += 1
+                self._mark_seen(current["id"])
+                continue
+
+            if row is not None and (current is None or current["id"] == row["id"]):
+                # то же предложение поставщика — обновляем строку на месте
+                info.id = row["id"]
+                to_update.append(info)
+                self.rows["offers_updated"] += 1
+                written.append((row["id"], product_id, offer["parameters"]))
+                continue
+
+            if row is not None:
+                # предложение переехало на товар, у которого уже есть строка
+                # магазина: освобождаем внешний id у старой строки
+                to_release.append(ProductInfo(id=row["id"], external_id=None))
+
+            to_upsert.append(info)
+            if current is None:
+                self.rows["offers_created"] += 1
+            else:
+                self.rows["offers_updated"] += 1
+                written.append((current["id"], product_id, offer["parameters"]))
+
+        if to_release:
+            ProductInfo.objects.bulk_update(
+                to_release, ["external_id"], batch_size=self.chunk_size
+            )
+        if to_update:
+            ProductInfo.objects.bulk_update(
+                to_update, fields, batch_size=self.chunk_size
+            )
+        if to_upsert:
+            # upsert по уникальному ключу (product, shop)
+            ProductInfo.objects.bulk_create(
+                to_upsert,
+                update_conflicts=True,
+                unique_fields=["product", "shop"],
+                update_fields=fields[1:],
+                batch_size=self.chunk_size,
+            )
+
+            created = [
+                info.product_id for info in to_upsert
+                if info.product_id not in current_rows
+            ]
+            if created:
+                rows = ProductInfo.objects.filter(
+                    shop=self.shop, product_id__in=created
+                ).values_list("product_id", "id")
+                written.extend(
+                    (product_info_id, product_id, by_product[product_id]["parameters"])
+                    for product_id, product_info_id in rows
+                )
+
+        for product_info_id, _, _ in written:
+            self._mark_seen(product_info_id)
+        return written
+
+    def _sync_parameter_names(self, names):
+        unknown = [
+            name for name in dict.fromkeys(names) if name not in self.parameters
+        ]
+        if not unknown:
+            return
+
+        self.parameters.update(
+            Parameter.objects.filter(name__in=unknown).values_list("name", "id")
+        )
+
+        missing = [name for name in unknown if name not in self.parameters]
+        if missing:
+            # как и категории, параметры общие для всех магазинов
+            created, count = _create_names(Parameter, missing, self.chunk_size)
+            self.parameters.update(created)
+            self.rows["parameters_created"] += count
+
+    def _sync_parameters(self, written):
+        """Приводит параметры записанных предложений к данным из файла."""
+        if not written:
+            return
+
+        self._sync_parameter_names(
+            name for _, _, parameters in written for name in parameters
+        )
+
+        existing = {
+            (row["product_info_id"], row["parameter_id"]): row
+            for row in ProductParameter.objects.filter(
+                product_info_id__in=[product_info_id for product_info_id, _, _ in written]
+            ).values("id", "product_info_id", "parameter_id", "value")
+        }
+
+        to_create = []
+        to_update = []
+        for product_info_id, _, parameters in written:
+            for name, value in parameters.items():
+                parameter_id = self.parameters[name]
+                current = existing.pop((product_info_id, parameter_id), None)
+                if current is None:
+                    to_create.append(
+                        ProductParameter(
+                            product_info_id=product_info_id,
+                            parameter_id=parameter_id,
+                            value=value,
+                        )
+                    )
+                elif current["value"] != value:
+                    to_update.append(ProductParameter(id=current["id"], value=value))
+                else:
+                    self.rows["parameter_values_unchanged"] += 1
+
+        # всё, что осталось в existing, из файла пропало
+        to_delete = [row["id"] for row in existing.values()]
+
+        if to_create:
+            ProductParameter.objects.bulk_create(
+                to_create, batch_size=self.chunk_size
+            )
+            self.rows["parameter_values_created"] += len(to_create)
+        if to_update:
+            ProductParameter.objects.bulk_update(
+                to_update, ["value"], batch_size=self.chunk_size
+            )
+            self.rows["parameter_values_updated"] += len(to_update)
+        if to_delete:
+            ProductParameter.objects.filter(id__in=to_delete).delete()
+            self.rows["parameter_values_removed"] += len(to_delete)
+
+        # фасеты записанных предложений повторяют их параметры из файла
+        index_offers(
+            [
+                (
+                    product_info_id,
+                    product_id,
+                    {self.parameters[name]: value for name, value in parameters.items()},
+                )
+                for product_info_id, product_id, parameters in written
+            ],
+            batch_size=self.chunk_size,
+        )
+
+
+def import_products_from_yaml(
+    file_path, user, chunk_size=IMPORT_CHUNK_SIZE, progress=None, sync=None
+):
+    """
+    Импортирует товары из YAML для магазина, привязанного к пользователю.
+
+    sync="zero" или sync="delete" включает полную синхронизацию:
+    предложения магазина, которых нет в файле, обнуляются или удаляются.
+    """
+
+    started = time.perf_counter()
+
+    # Читаем YAML потоково: шапка сразу, товары — по одному
+    read_started = time.perf_counter()
+    with open_price_list(file_path) as reader:
+        read_time = time.perf_counter() - read_started
+
+        with transaction.atomic():
+            # Название магазина в YAML (обязательное поле)
+            shop = resolve_shop(user, reader.shop)
+
+            importer = ProductImporter(
+                shop, chunk_size=chunk_size, progress=progress, sync=sync
+            )
+            importer.timings["read"] = read_time
+
+            # Категории (со связью с магазином)
+            importer.import_categories(reader.categories)
+
+        # Товары — пачками, каждая в своей транзакции
+        importer.import_goods(reader.iter_goods())
+
+    # Предложения, пропавшие из прайса (только в режиме sync)
+    importer.prune()
+
+    result = importer.result()
+    result["timings"]["total"] = round(time.perf_counter() - started, 4)
+
     # Ответ для API
     return {
         "status": "import completed",
         "shop": shop.name,
+        **result,
     }
-
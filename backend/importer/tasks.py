@@ -0,0 +1,43 @@
+import os
+from functools import partial
+
+from celery import shared_task
+from django.contrib.auth import get_user_model
+
+from . import jobs
+from .services import import_products_from_yaml
+
+
+@shared_task
+def run_import_job(job_id, file_path, user_id, delete_file=False, sync=None):
+    # задача Celery: импорт прайса с записью прогресса в состояние задачи;
+    # delete_file — файл загружен через API и после импорта не нужен;
+    # sync — что делать с предложениями, пропавшими из прайса
+    # поиск пользователя и старт задачи — тоже внутри try: иначе при их
+    # ошибке задача навсегда осталась бы в статусе queued
+    try:
+        user = get_user_model().objects.get(id=user_id)
+        jobs.start_job(job_id)
+
+        result = import_products_from_yaml(
+            file_path=file_path,
+            user=user,
+            progress=partial(jobs.report_progress, job_id),
+            sync=sync,
+        )
+    except get_user_model().DoesNotExist:
+        jobs.fail_job(job_id, "user not found")
+        return None
+    except ValueError as e:
+        # ошибки данных (формат YAML, чужой магазин) — показываем поставщику
+        jobs.fail_job(job_id, str(e))
+        return None
+    except Exception:
+        jobs.fail_job(job_id, "internal import error")
+        raise
+    finally:
+        if delete_file and os.path.exists(file_path):
+            os.remove(file_path)
+
+    jobs.finish_job(job_id, result)
+    return result
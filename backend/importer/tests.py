@@ -1,2 +1,216 @@
-
 # Create your tests here.
+
+import shutil
+import tempfile
+from pathlib import Path
+
+import yaml
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from products.models import Category, Parameter, Product, ProductInfo, ProductParameter
+from products.tasks import ORPHAN_GRACE_PERIOD, cleanup_orphaned_catalog
+from . import jobs
+from .parser import open_price_list
+from .services import import_products_from_yaml
+from .tasks import run_import_job
+
+
+class PriceListReaderTestCase(SimpleTestCase):
+    def setUp(self):
+        self.work_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work_dir)
+
+    def _write(self, text):
+        path = self.work_dir / "price.yaml"
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def test_goods_before_header(self):
+        # safe_dump сортирует ключи: categories, goods, shop
+        path = self._write(yaml.safe_dump({
+            "shop": "Связной",
+            "categories": [{"id": 224, "name": "Смартфоны"}],
+            "goods": [{"id": index, "name": f"Телефон {index}"} for index in range(3)],
+        }, allow_unicode=True))
+
+        with open_price_list(path) as reader:
+            self.assertEqual(reader.shop, "Связной")
+            self.assertEqual(reader.categories, [{"id": 224, "name": "Смартфоны"}])
+            self.assertEqual([item["id"] for item in reader.iter_goods()], [0, 1, 2])
+
+    def test_good_anchors_are_dropped(self):
+        path = self._write(
+            "shop: &shop Связной\n"
+            "goods:\n"
+            "  - {id: 1, name: &name Телефон, model: *name}\n"
+            "  - {id: 2, name: *shop}\n"
+            "categories: []\n"
+        )
+        with open_price_list(path) as reader:
+            goods = reader.iter_goods()
+            self.assertEqual(next(goods)["model"], "Телефон")
+            self.assertEqual(next(goods)["name"], "Связной")
+            self.assertEqual(list(reader._anchors), ["shop"])
+
+
+class ImportProductsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.work_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work_dir)
+        self.user = get_user_model().objects.create_user(
+            username="import_supplier", email="import@test.com", password="12345678"
+        )
+        self.goods = [
+            {
+                "id": index,
+                "category": 224,
+                "model": f"model/{index}",
+                "name": f"Телефон {index}",
+                "price": 100 + index,
+                "price_rrc": 110 + index,
+                "quantity": 5,
+                "parameters": {"Цвет": "черный", "Память": 64},
+            }
+            for index in range(3)
+        ]
+
+    def _import(self, goods=None, **kwargs):
+        path = self.work_dir / "price.yaml"
+        path.write_text(yaml.safe_dump({
+            "shop": "Связной",
+            "categories": [{"id": 224, "name": "Смартфоны"}],
+            "goods": self.goods if goods is None else goods,
+        }, allow_unicode=True), encoding="utf-8")
+        return import_products_from_yaml(path, self.user, **kwargs)["rows"]
+
+    def test_initial_import(self):
+        rows = self._import()
+        self.assertEqual(rows["categories_created"], 1)
+        self.assertEqual(rows["goods"], 3)
+        self.assertEqual(rows["products_created"], 3)
+        self.assertEqual(rows["offers_created"], 3)
+        self.assertEqual(rows["parameters_created"], 2)
+        self.assertEqual(rows["parameter_values_created"], 6)
+        self.assertEqual(ProductParameter.objects.count(), 6)
+
+    def test_same_name_goods_share_one_product(self):
+        self.goods[1]["name"] = self.goods[0]["name"]
+        rows = self._import()
+        self.assertEqual(rows["products_created"], 2)
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(rows["goods_skipped"], 1)
+
+        # предложение остаётся у первого товара, повторные импорты ничего не меняют
+        for chunk_size in (1000, 1):
+            rows = self._import(chunk_size=chunk_size)
+            self.assertEqual(rows["offers_updated"], 0)
+            self.assertEqual(rows["offers_unchanged"], 2)
+            self.assertEqual(rows["goods_skipped"], 1)
+        self.assertEqual(
+            dict(ProductInfo.objects.values_list("external_id", "price")),
+            {"0": 110, "2": 112},
+        )
+
+    def test_unchanged_reimport_is_skipped(self):
+        self._import()
+        rows = self._import()
+        self.assertEqual(rows["offers_unchanged"], 3)
+        for name in (
+            "categories_created", "products_created", "offers_created",
+            "offers_updated", "parameters_created", "parameter_values_created",
+            "parameter_values_updated", "parameter_values_removed",
+        ):
+            self.assertEqual(rows[name], 0, name)
+
+    def test_price_and_parameter_changes(self):
+        self._import()
+        self.goods[0]["price_rrc"] = 500
+        self.goods[1]["parameters"] = {"Цвет": "белый"}
+
+        rows = self._import()
+        self.assertEqual(rows["offers_unchanged"], 1)
+        self.assertEqual(rows["offers_updated"], 2)
+        self.assertEqual(rows["parameter_values_unchanged"], 2)
+        self.assertEqual(rows["parameter_values_updated"], 1)
+        self.assertEqual(rows["parameter_values_removed"], 1)
+
+        self.assertEqual(ProductInfo.objects.get(external_id="0").price, 500)
+        self.assertEqual(
+            dict(
+                ProductParameter.objects.filter(product_info__external_id="1")
+                .values_list("parameter__name", "value")
+            ),
+            {"Цвет": "белый"},
+        )
+
+    def test_sync_zero(self):
+        self._import()
+        rows = self._import(self.goods[:1], sync="zero")
+        self.assertEqual(rows["offers_zeroed"], 2)
+        self.assertEqual(rows["offers_removed"], 0)
+        self.assertEqual(
+            dict(ProductInfo.objects.values_list("external_id", "quantity")),
+            {"0": 5, "1": 0, "2": 0},
+        )
+
+    def test_job_fails_for_missing_user(self):
+        job = jobs.create_job(self.user.id)
+        path = self.work_dir / "price.yaml"
+        path.write_text("shop: Связной\n", encoding="utf-8")
+
+        run_import_job(job["id"], str(path), user_id=0)
+        job = jobs.get_job(job["id"])
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "user not found")
+
+    def test_sync_delete_keeps_ordered_offers(self):
+        self._import()
+        ordered = ProductInfo.objects.get(external_id="1")
+        OrderItem.objects.create(
+            order=Order.objects.create(user=self.user, status="new"),
+            product_info=ordered,
+            quantity=1,
+            price=ordered.price,
+        )
+
+        rows = self._import(self.goods[:1], sync="delete")
+        self.assertEqual(rows["offers_removed"], 1)
+        self.assertEqual(rows["parameter_values_removed"], 2)
+        # предложение из заказа только обнуляется
+        self.assertEqual(rows["offers_zeroed"], 1)
+        self.assertEqual(
+            dict(ProductInfo.objects.values_list("external_id", "quantity")),
+            {"0": 5, "1": 0},
+        )
+
+    def test_cleanup_removes_only_pruned_products(self):
+        self._import()
+        # товар из админки, у которого ещё нет предложений
+        manual = Product.objects.create(
+            name="Новинка", category=Category.objects.get(name="Смартфоны")
+        )
+        self._import(self.goods[:1], sync="delete")
+        # параметр, который идущий импорт только что создал, но ещё не заполнил
+        fresh = Parameter.objects.create(name="Вес")
+        Parameter.objects.create(name="Старый")
+        Parameter.objects.filter(name="Старый").update(created_at=None)
+
+        # только что отмеченные товары ещё не считаются брошенными
+        self.assertEqual(
+            cleanup_orphaned_catalog(), {"products": 0, "parameters": 1, "facets": 0}
+        )
+        self.assertTrue(Parameter.objects.filter(id=fresh.id).exists())
+
+        Product.objects.exclude(pruned_at=None).update(
+            pruned_at=timezone.now() - ORPHAN_GRACE_PERIOD
+        )
+        self.assertEqual(cleanup_orphaned_catalog()["products"], 2)
+        self.assertEqual(
+            set(Product.objects.values_list("name", flat=True)), {"Телефон 0", "Новинка"}
+        )
+        self.assertTrue(Product.objects.filter(id=manual.id).exists())
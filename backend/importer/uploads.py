@@ -0,0 +1,70 @@
+"""
+Приём прайс-листов, загруженных через multipart/form-data.
+
+Тело запроса пишется на диск кусками прямо в каталог IMPORT_UPLOAD_DIR,
+без буферизации всего файла в памяти и без копирования во временный
+файл Django: задача импорта читает этот же файл и удаляет его после работы.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class StoredPriceList(UploadedFile):
+    """Загруженный прайс, уже лежащий на диске в IMPORT_UPLOAD_DIR."""
+
+    def __init__(self, path, name, content_type, size, charset,
+                 content_type_extra=None):
+        super().__init__(None, name, content_type, size, charset, content_type_extra)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+    def discard(self):
+        # удалить файл, если импорт так и не был поставлен в очередь
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class PriceListUploadHandler(FileUploadHandler):
+    """Обработчик загрузки, который пишет файл по частям в IMPORT_UPLOAD_DIR."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        os.makedirs(settings.IMPORT_UPLOAD_DIR, exist_ok=True)
+        self.file = tempfile.NamedTemporaryFile(
+            dir=settings.IMPORT_UPLOAD_DIR,
+            prefix="price-list-",
+            suffix=".upload",
+            delete=False,
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file.write(raw_data)
+        # None — дальше по цепочке обработчиков данные не передаются
+        return None
+
+    def file_complete(self, file_size):
+        self.file.close()
+        return StoredPriceList(
+            path=self.file.name,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+        )
+
+    def upload_interrupted(self):
+        if hasattr(self, "file"):
+            self.file.close()
+            try:
+                os.remove(self.file.name)
+            except FileNotFoundError:
+                pass
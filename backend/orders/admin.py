@@ -1,13 +1,14 @@
 from django.contrib import admin
 from .models import Order, OrderItem
+from .versions import bump_orders
 
 
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
-    readonly_fields = ('product_info', 'total_price', 'get_shop')
-    fields = ('product_info', 'get_shop', 'quantity', 'total_price', 'status')
+    readonly_fields = ('product_info', 'price', 'total_price', 'get_shop')
+    fields = ('product_info', 'get_shop', 'quantity', 'price', 'total_price', 'status')
 
     def get_shop(self, obj):
         if obj.product_info and obj.product_info.shop:
@@ -18,6 +19,20 @@ class OrderItemInline(admin.TabularInline):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'status', 'created_at')
+    list_display = ('id', 'user', 'status', 'total', 'created_at')
     list_filter = ('status',)
-    inlines = [OrderItemInline]
\ No newline at end of file
+    inlines = [OrderItemInline]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # количество или состав позиций могли измениться
+        Order.objects.filter(id=form.instance.id).update_totals()
+        bump_orders([form.instance.id])
+
+    def delete_model(self, request, obj):
+        bump_orders([obj.id])
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        bump_orders(queryset.values_list('id', flat=True))
+        super().delete_queryset(request, queryset)
@@ -0,0 +1,64 @@
+"""
+Пакетное изменение корзины.
+
+Строки пакета (добавить, установить количество, удалить) сводятся
+в памяти к итоговому количеству по каждому предложению и применяются
+одним upsert'ом по уникальному (заказ, предложение) и одним DELETE;
+сумма корзины пересчитывается там же (OrderQuerySet.update_totals).
+Вызывать в транзакции.
+"""
+from .models import Order, OrderItem
+
+
+# сколько строк принимает один пакет
+CART_BATCH_SIZE = 500
+
+
+def apply_batch(cart, lines, prices):
+    """
+    Применяет строки пакета к корзине в порядке следования.
+
+    prices — {product_info: текущая цена}: по ней фиксируется цена новых
+    позиций, у существующих цена не меняется.
+    Возвращает (число добавленных или изменённых позиций, число удалённых).
+    """
+    existing = dict(
+        cart.items.filter(product_info_id__in=prices)
+        .values_list("product_info_id", "quantity")
+    )
+
+    quantities = dict(existing)
+    for line in lines:
+        product_info_id = line["product_info"]
+        if line["action"] == "add":
+            quantities[product_info_id] = quantities.get(product_info_id, 0) + line["quantity"]
+        elif line["action"] == "set":
+            quantities[product_info_id] = line["quantity"]
+        else:
+            quantities[product_info_id] = 0
+
+    upserts = [
+        OrderItem(
+            order=cart, product_info_id=product_info_id, quantity=quantity,
+            price=prices[product_info_id], status="cart",
+        )
+        for product_info_id, quantity in quantities.items()
+        if quantity > 0 and quantity != existing.get(product_info_id)
+    ]
+    removed = [
+        product_info_id for product_info_id, quantity in quantities.items()
+        if quantity == 0 and product_info_id in existing
+    ]
+
+    if upserts:
+        OrderItem.objects.bulk_create(
+            upserts,
+            update_conflicts=True,
+            unique_fields=["order", "product_info"],
+            update_fields=["quantity"],
+        )
+    if removed:
+        cart.items.filter(product_info_id__in=removed).delete()
+    if upserts or removed:
+        Order.objects.filter(id=cart.id).update_totals()
+    return len(upserts), len(removed)
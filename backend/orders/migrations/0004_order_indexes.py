@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0001_initial'),
+        ('orders', '0003_alter_order_created_at'),
+        ('products', '0007_product_name_category_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'status', '-created_at'], name='order_user_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'cart'), _negated=True), fields=['user', '-created_at'], name='order_placed_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'cart')), fields=['user'], name='order_cart_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['order', 'status'], name='orderitem_order_status_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.10 on 2026-10-18 18:02
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_prices(apps, schema_editor):
+    # прежние цены не сохранились: фиксируем текущие цены предложений
+    # и считаем по ним суммы заказов
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    ProductInfo = apps.get_model('products', 'ProductInfo')
+
+    OrderItem.objects.update(price=Subquery(
+        ProductInfo.objects.filter(pk=OuterRef('product_info_id')).values('price')[:1]
+    ))
+    totals = (
+        OrderItem.objects.filter(order=OuterRef('pk'))
+        .order_by()
+        .values('order')
+        .annotate(total=Sum(F('price') * F('quantity')))
+        .values('total')
+    )
+    Order.objects.update(total=Coalesce(
+        Subquery(totals, output_field=DecimalField(max_digits=12, decimal_places=2)),
+        0,
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_indexes'),
+        ('products', '0010_catalog_offer_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.10 on 2026-10-18 18:10
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_items(apps, schema_editor):
+    # дубли (заказ, предложение) сливаем в самую раннюю позицию;
+    # сумма заказа при этом не меняется
+    OrderItem = apps.get_model('orders', 'OrderItem')
+
+    duplicates = (
+        OrderItem.objects.values('order_id', 'product_info_id')
+        .annotate(first_id=Min('id'), quantity=Sum('quantity'), items=Count('id'))
+        .filter(items__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        OrderItem.objects.filter(id=row['first_id']).update(quantity=row['quantity'])
+        OrderItem.objects.filter(
+            order_id=row['order_id'], product_info_id=row['product_info_id'],
+        ).exclude(id=row['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_order_price_snapshot'),
+        ('products', '0010_catalog_offer_totals'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='orderitem',
+            constraint=models.UniqueConstraint(fields=('order', 'product_info'), name='orderitem_order_product_info_uniq'),
+        ),
+    ]
@@ -2,7 +2,26 @@ from django.db import models
 from django.conf import settings
 from contacts.models import Contact
 from products.models import ProductInfo
-from django.db.models import Sum, F
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+class OrderQuerySet(models.QuerySet):
+    def update_totals(self):
+        # пересчитать сохранённые суммы заказов выборки одним UPDATE
+        # (вызывать в той же транзакции, что и изменение позиций)
+        totals = (
+            OrderItem.objects.filter(order=OuterRef('pk'))
+            .order_by()
+            .values('order')
+            .annotate(total=Sum(F('price') * F('quantity')))
+            .values('total')
+        )
+        return self.update(total=Coalesce(
+            Subquery(totals, output_field=DecimalField(max_digits=12, decimal_places=2)),
+            0,
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ))
 
 
 class Order(models.Model):
@@ -29,7 +48,8 @@ class Order(models.Model):
     )
 
     # дата/время создания заказа
-    created_at = models.DateTimeField(auto_now_add=True)
+    # индекс нужен для курсорной пагинации списков заказов
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     # контакт доставки (адрес/телефон), может быть пустым пока заказ не подтвержден
     contact = models.ForeignKey(
@@ -40,14 +60,37 @@ class Order(models.Model):
         blank=True
     )
 
+    # сумма заказа по зафиксированным ценам позиций;
+    # пересчитывается при изменении позиций (OrderQuerySet.update_totals)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # корзина и заказы пользователя в нужном статусе, новые сначала
+            models.Index(
+                fields=['user', 'status', '-created_at'],
+                name='order_user_status_created_idx',
+            ),
+            # список заказов покупателя (всё, кроме корзины)
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=~models.Q(status='cart'),
+                name='order_placed_user_created_idx',
+            ),
+            # корзины: одна на пользователя, ищется при каждом запросе /cart/
+            models.Index(
+                fields=['user'],
+                condition=models.Q(status='cart'),
+                name='order_cart_user_idx',
+            ),
+        ]
+
     @property
     def total_price(self):
-        # итоговая сумма заказа = сумма (цена товара * количество) по всем позициям
-        return (self.items.aggregate(
-            total=Sum(
-                F('product_info__price') * F('quantity')
-            )
-        )['total'] or 0)
+        # итоговая сумма заказа — сохранённая, без запроса к позициям
+        return self.total
 
     def __str__(self):
         # строковое представление заказа в админке/логах
@@ -79,6 +122,11 @@ class OrderItem(models.Model):
     # количество товара в позиции
     quantity = models.PositiveIntegerField()
 
+    # цена за единицу на момент добавления в корзину (обновляется при
+    # подтверждении заказа); дальнейшие изменения цены поставщиком
+    # на заказ не влияют
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
     # статус позиции (может отличаться от общего статуса заказа)
     status = models.CharField(
         max_length=20,
@@ -86,10 +134,29 @@ class OrderItem(models.Model):
         default='new'
     )
 
+    class Meta:
+        indexes = [
+            # позиции заказа в статусе (закрытие заказа, статус поставщика)
+            models.Index(fields=['order', 'status'], name='orderitem_order_status_idx'),
+        ]
+        constraints = [
+            # одна позиция на предложение в заказе: корзина меняется upsert'ом
+            models.UniqueConstraint(
+                fields=['order', 'product_info'],
+                name='orderitem_order_product_info_uniq',
+            ),
+        ]
+
     @property
     def total_price(self):
-        # стоимость позиции = цена * количество
-        return self.product_info.price * self.quantity
+        # стоимость позиции = зафиксированная цена * количество
+        return self.price * self.quantity
+
+    def save(self, *args, **kwargs):
+        # позиция без цены (например, добавленная в админке) — по текущей цене предложения
+        if self.price is None:
+            self.price = self.product_info.price
+        super().save(*args, **kwargs)
 
     def __str__(self):
         # отображение позиции в админке (сейчас просто имя покупателя)
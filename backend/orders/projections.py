@@ -0,0 +1,44 @@
+"""
+Список заказов без сериализаторов.
+
+Заказы страницы и их позиции читаются двумя запросами .values()
+и собираются за один проход в тот же JSON, что отдаёт
+OrderListSerializer; сумма заказа — сохранённая (Order.total), без
+агрегата по позициям. Совпадение форматов проверяет
+тест api.tests.ListProjectionTestCase.
+"""
+from .models import OrderItem
+from .serializers import OrderListSerializer
+
+
+# поля Order, из которых собирается заказ списка;
+# created_at нужен и курсорной пагинации
+ORDER_VALUES = ("id", "status", "total", "created_at")
+
+# форматирование суммы и даты — полями сериализатора, чтобы вывод совпадал
+_fields = OrderListSerializer().fields
+
+
+def order_list(rows):
+    """Строки Order.objects.values(*ORDER_VALUES) -> заказы списка."""
+    orders = {
+        row["id"]: {
+            "id": row["id"],
+            "status": row["status"],
+            "items": [],
+            "total_price": _fields["total_price"].to_representation(row["total"]),
+            "created_at": _fields["created_at"].to_representation(row["created_at"]),
+        }
+        for row in rows
+    }
+
+    items = (
+        OrderItem.objects.filter(order_id__in=orders.keys())
+        .order_by("id")
+        .values_list("order_id", "id", "product_info_id", "quantity")
+    )
+    for order_id, item_id, product_info_id, quantity in items:
+        orders[order_id]["items"].append(
+            {"id": item_id, "product_info": product_info_id, "quantity": quantity}
+        )
+    return list(orders.values())
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from contacts.serializers import ContactSerializer
+from .cart import CART_BATCH_SIZE
 from .models import Order, OrderItem
 from products.models import ProductInfo
 
@@ -16,6 +17,54 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'product_info', 'quantity']
 
 
+class CartBatchLineSerializer(serializers.Serializer):
+    # строка пакетного изменения корзины: add — добавить quantity,
+    # set — установить quantity (0 — удалить), remove — удалить позицию
+    product_info = serializers.IntegerField()
+    action = serializers.ChoiceField(choices=['add', 'set', 'remove'], default='add')
+    quantity = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, data):
+        if data['action'] == 'add' and not data.get('quantity'):
+            raise serializers.ValidationError('quantity must be positive for add.')
+        if data['action'] == 'set' and 'quantity' not in data:
+            raise serializers.ValidationError('quantity is required for set.')
+        return data
+
+
+class CartBatchSerializer(serializers.Serializer):
+    # пакет строк; предложения проверяются одним запросом
+    items = CartBatchLineSerializer(many=True, allow_empty=False, max_length=CART_BATCH_SIZE)
+
+    def validate(self, data):
+        ids = {line['product_info'] for line in data['items']}
+        offers = {
+            offer_id: (price, is_accepting_orders)
+            for offer_id, price, is_accepting_orders in ProductInfo.objects.filter(
+                id__in=ids
+            ).values_list('id', 'price', 'shop__is_accepting_orders')
+        }
+
+        missing = sorted(ids - offers.keys())
+        if missing:
+            raise serializers.ValidationError(
+                {'items': f"Unknown product_info: {', '.join(map(str, missing))}."}
+            )
+        closed = sorted({
+            line['product_info'] for line in data['items']
+            if line['action'] != 'remove' and not offers[line['product_info']][1]
+        })
+        if closed:
+            raise serializers.ValidationError({
+                'items': "Shops are not accepting orders for product_info: "
+                         f"{', '.join(map(str, closed))}."
+            })
+
+        # текущие цены — для новых позиций
+        data['prices'] = {offer_id: price for offer_id, (price, _) in offers.items()}
+        return data
+
+
 class OrderItemDetailSerializer(serializers.ModelSerializer):
     # название товара
     product_name = serializers.CharField(
@@ -27,9 +76,8 @@ class OrderItemDetailSerializer(serializers.ModelSerializer):
         source='product_info.shop.name',
         read_only=True
     )
-    # цена товара в магазине
+    # зафиксированная цена товара в магазине
     price = serializers.DecimalField(
-        source='product_info.price',
         max_digits=10,
         decimal_places=2,
         read_only=True
@@ -45,7 +93,7 @@ class OrderItemDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'shop', 'product_name', 'quantity', 'price', 'total_price', 'status']
 
     def get_total_price(self, instance):
-        return instance.product_info.price * instance.quantity
+        return instance.total_price
 
 
 class OrderListSerializer(serializers.ModelSerializer):
@@ -109,9 +157,8 @@ class SupplierOrderItemSerializer(serializers.ModelSerializer):
         source='product_info.product.name',
         read_only=True
     )
-    # цена товара
+    # зафиксированная цена товара
     price = serializers.DecimalField(
-        source='product_info.price',
         max_digits=10,
         decimal_places=2,
         read_only=True
@@ -125,7 +172,7 @@ class SupplierOrderItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'product_name', 'quantity', 'price', 'total_price']
 
     def get_total_price(self, instance):
-        return instance.product_info.price * instance.quantity
+        return instance.total_price
 
 
 class SupplierOrderDetailSerializer(serializers.ModelSerializer):
@@ -204,10 +251,10 @@ class SupplierOrderDetailSerializer(serializers.ModelSerializer):
         total = 0
         qs = instance.items.filter(
             product_info__shop__name=supplier_shop_name
-        ).select_related("product_info")
+        )
 
         for item in qs:
-            total += item.product_info.price * item.quantity
+            total += item.total_price
 
         return total
 
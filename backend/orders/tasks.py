@@ -33,7 +33,7 @@ def send_order_to_admin(order_id):
     for item in items:
         lines.append(
             f"{item.product_info.product.name} - "
-            f"{item.quantity} шт х {item.product_info.price}"
+            f"{item.quantity} шт х {item.price}"
         )
 
     # берём контакт доставки
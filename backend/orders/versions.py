@@ -0,0 +1,58 @@
+"""
+Версии заказов для условных GET-запросов (ETag, Last-Modified).
+
+Устроены как версии каталога (products/versions.py): своя версия у
+заказов каждого покупателя и у заказов каждого поставщика. Цены и
+суммы заказов зафиксированы в самих заказах, поэтому заказы покупателя
+от каталога не зависят. Поставщику же отдаются названия товаров
+и магазинов из каталога, и его валидатор — пара (версия заказов,
+версия каталога), читаемая одним запросом к кэшу.
+"""
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+from products.versions import CATALOG_VERSION_KEY, get_versions
+
+from .models import Order, OrderItem
+
+
+CUSTOMER_VERSION_KEY = "orders:version:customer:{}"
+SUPPLIER_VERSION_KEY = "orders:version:supplier:{}"
+
+
+def customer_versions(user_id):
+    return get_versions(CUSTOMER_VERSION_KEY.format(user_id))
+
+
+def supplier_versions(user_id):
+    return get_versions(SUPPLIER_VERSION_KEY.format(user_id), CATALOG_VERSION_KEY)
+
+
+def _set(keys):
+    version = time.time_ns()
+    cache.set_many({key: version for key in keys}, timeout=None)
+
+
+def bump_orders(order_ids):
+    """
+    Меняет версии покупателей и поставщиков заказов после коммита.
+
+    Покупатели и поставщики ищутся сразу, чтобы работало и для
+    удаляемых заказов.
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return
+
+    customers = Order.objects.filter(id__in=order_ids).values_list("user_id", flat=True)
+    suppliers = (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .values_list("product_info__shop__user_id", flat=True)
+        .distinct()
+    )
+    keys = [CUSTOMER_VERSION_KEY.format(user_id) for user_id in customers]
+    keys.extend(SUPPLIER_VERSION_KEY.format(user_id) for user_id in suppliers)
+    transaction.on_commit(partial(_set, keys))
@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import Product, Parameter
-from .tasks import generate_product_thumbnails
+from .catalog import schedule_refresh
+from .models import Product, Parameter, ProductInfo
+from .search import index_products, remove_products
+from .thumbnails import PRODUCT_IMAGE, schedule_thumbnails
 # Register your models here.
 
 
@@ -15,10 +17,49 @@ class ProductAdmin(admin.ModelAdmin):
     )
 
     def save_model(self, request, obj, form, change):
+        if 'image' in form.changed_data:
+            # миниатюры старого изображения больше не подходят,
+            # новые пути запишет задача генерации
+            obj.thumbnails = {}
         super().save_model(request, obj, form, change)
+        # название и категория есть в поисковом индексе — строка товара
+        # обновляется в той же транзакции, что и сам товар
+        if not change or {'name', 'category'} & set(form.changed_data):
+            index_products([obj.id])
+        # документ каталога пересобирается после коммита
+        schedule_refresh([obj.id])
 
-        if obj.image:
-            generate_product_thumbnails.delay(obj.id)
+        if obj.image and 'image' in form.changed_data:
+            schedule_thumbnails([obj.image.name], PRODUCT_IMAGE)
 
+    def delete_model(self, request, obj):
+        self._before_delete([obj.id])
+        super().delete_model(request, obj)
 
-admin.site.register(Parameter)
\ No newline at end of file
+    def delete_queryset(self, request, queryset):
+        self._before_delete(list(queryset.values_list('id', flat=True)))
+        super().delete_queryset(request, queryset)
+
+    def _before_delete(self, product_ids):
+        # документы каталога удаляются каскадно; версии товаров и их магазинов
+        # меняются после коммита, поэтому магазины запоминаем до удаления предложений
+        shop_ids = set(
+            ProductInfo.objects.filter(product_id__in=product_ids)
+            .values_list('shop_id', flat=True)
+        )
+        remove_products(product_ids)
+        schedule_refresh(product_ids, shop_ids=shop_ids)
+
+
+@admin.register(Parameter)
+class ParameterAdmin(admin.ModelAdmin):
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+
+        # имя параметра есть в документах каталога всех товаров с ним
+        if change and 'name' in form.changed_data:
+            schedule_refresh(
+                ProductInfo.objects.filter(parameters__parameter=obj)
+                .values_list('product_id', flat=True).distinct()
+            )
\ No newline at end of file
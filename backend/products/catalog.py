@@ -0,0 +1,181 @@
+"""
+Денормализованный каталог: документ CatalogEntry на каждый товар.
+
+Документ собирается из строк .values() в формате ProductInfoSerializer
+(совпадение проверяет api.tests.ListProjectionTestCase): без моделей и
+обхода полей сериализатора на каждое предложение и параметр. Пересборка идемпотентна: upsert по товару,
+повторный вызов для тех же товаров даёт тот же результат.
+Импорт обновляет документы товаров каждой пачки, правки в админке —
+после коммита (schedule_refresh в ProductAdmin, ParameterAdmin, ShopAdmin).
+Вместе с документом пересчитываются агрегаты предложений (лучшая цена,
+остаток, число магазинов) — по ним список товаров сортирует и фильтрует.
+"""
+from decimal import Decimal, InvalidOperation
+from functools import partial
+
+from django.db import transaction
+
+from . import versions
+from .images import PREVIEW_ALIAS
+from .models import CatalogEntry, Product, ProductInfo, ProductParameter
+
+
+# сколько товаров пересобирается за один проход
+CATALOG_CHUNK_SIZE = 500
+
+ENTRY_FIELDS = [
+    "category", "name", "category_name", "image", "image_preview", "offers",
+    "offer_parameters", "min_price", "total_quantity", "shops_count", "updated_at",
+]
+
+# ?ordering= списка товаров -> порядок курсорной пагинации
+CATALOG_ORDERINGS = {
+    "price": ("min_price", "pk"),
+    "-price": ("-min_price", "-pk"),
+}
+
+
+def offer_documents(product_ids, product_info_model=ProductInfo,
+                    parameter_model=ProductParameter):
+    """
+    {id товара: предложения в формате ProductInfoSerializer} — двумя запросами.
+
+    Модели передаются параметрами, чтобы миграции собирали документы
+    по историческим моделям тем же кодом.
+    """
+    parameters = {}
+    for row in parameter_model.objects.filter(
+        product_info__product_id__in=product_ids
+    ).order_by("id").values("product_info_id", "parameter__name", "value"):
+        parameters.setdefault(row["product_info_id"], []).append(
+            {"parameter": {"name": row["parameter__name"]}, "value": row["value"]}
+        )
+
+    offers = {}
+    for row in product_info_model.objects.filter(product_id__in=product_ids).order_by(
+        "id"
+    ).values("id", "product_id", "shop__name", "price", "quantity"):
+        offers.setdefault(row["product_id"], []).append({
+            "id": row["id"],
+            "shop": row["shop__name"],
+            "price": f"{row['price']:.2f}",
+            "quantity": row["quantity"],
+            "parameters": parameters.get(row["id"], []),
+        })
+    return offers
+
+
+def _entries(product_ids):
+    offers = offer_documents(product_ids)
+    entries = []
+    for row in Product.objects.filter(id__in=product_ids).values(
+        "id", "name", "category_id", "category__name", "image", "thumbnails"
+    ):
+        product_offers = offers.get(row["id"], [])
+        # лучшая цена — среди предложений в наличии, если такие есть
+        prices = [
+            Decimal(offer["price"]) for offer in product_offers if offer["quantity"] > 0
+        ] or [Decimal(offer["price"]) for offer in product_offers]
+        entries.append(CatalogEntry(
+            product_id=row["id"],
+            category_id=row["category_id"],
+            name=row["name"],
+            category_name=row["category__name"],
+            image=row["image"] or "",
+            image_preview=row["thumbnails"].get(PREVIEW_ALIAS, ""),
+            offers=[
+                {key: value for key, value in offer.items() if key != "parameters"}
+                for offer in product_offers
+            ],
+            offer_parameters=[offer["parameters"] for offer in product_offers],
+            min_price=min(prices, default=None),
+            total_quantity=sum(offer["quantity"] for offer in product_offers),
+            # у товара одно предложение на магазин (unique product + shop)
+            shops_count=len(product_offers),
+        ))
+    return entries
+
+
+def refresh_entries(product_ids, chunk_size=CATALOG_CHUNK_SIZE, shop_ids=()):
+    """
+    Пересобирает документы указанных товаров.
+
+    Документы удалённых товаров удаляются каскадно вместе с товаром.
+    После коммита меняются версии товаров, их магазинов и магазинов
+    shop_ids (например, магазина, у которого предложения удалены).
+    Возвращает число записанных документов.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    written = 0
+
+    for start in range(0, len(product_ids), chunk_size):
+        chunk = product_ids[start:start + chunk_size]
+        entries = _entries(chunk)
+        if entries:
+            CatalogEntry.objects.bulk_create(
+                entries,
+                update_conflicts=True,
+                unique_fields=["product"],
+                update_fields=ENTRY_FIELDS,
+                batch_size=chunk_size,
+            )
+        written += len(entries)
+
+        transaction.on_commit(partial(versions.bump, chunk, shop_ids))
+
+    return written
+
+
+def schedule_refresh(product_ids, shop_ids=()):
+    """Пересобирает документы после коммита текущей транзакции."""
+    product_ids = list(product_ids)
+    if product_ids or shop_ids:
+        transaction.on_commit(
+            partial(refresh_entries, product_ids, shop_ids=list(shop_ids))
+        )
+
+
+def rebuild_catalog(chunk_size=CATALOG_CHUNK_SIZE):
+    """Полностью пересобирает каталог."""
+    product_ids = Product.objects.order_by("id").values_list("id", flat=True)
+    return refresh_entries(product_ids.iterator(chunk_size=chunk_size), chunk_size)
+
+
+def _price(query_params, name):
+    value = query_params.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        price = None
+    if price is None or not price.is_finite():
+        raise ValueError(f"{name} must be a number")
+    return price
+
+
+def parse_offer_filters(query_params):
+    """
+    Возвращает (условия для CatalogEntry, порядок пагинации или None)
+    из ?min_price=, ?max_price=, ?in_stock=1 и ?ordering=price|-price.
+
+    Все условия — по индексированным агрегатам документа, без join'а
+    предложений. Некорректные значения — ValueError.
+    """
+    filters = {}
+    min_price, max_price = _price(query_params, "min_price"), _price(query_params, "max_price")
+    if min_price is not None:
+        filters["min_price__gte"] = min_price
+    if max_price is not None:
+        filters["min_price__lte"] = max_price
+    if query_params.get("in_stock") in ("1", "true"):
+        filters["total_quantity__gt"] = 0
+
+    ordering = query_params.get("ordering")
+    if not ordering:
+        return filters, None
+    if ordering not in CATALOG_ORDERINGS:
+        raise ValueError(f"ordering must be one of: {', '.join(CATALOG_ORDERINGS)}")
+    # у товара без предложений нет цены — и места в сортировке по ней
+    filters["min_price__isnull"] = False
+    return filters, CATALOG_ORDERINGS[ordering]
@@ -0,0 +1,179 @@
+"""
+Фасетные фильтры каталога по значениям параметров.
+
+Параметры хранятся в ProductParameter как EAV, поэтому фильтр по
+нескольким параметрам потребовал бы по join'у на каждый. Вместо этого
+импорт поддерживает индекс OfferFacet: (параметр, значение) -> предложение.
+Фильтр ?param[Цвет]=черный&param[Встроенная память (Гб)]=256 — это
+пересечение множеств предложений по уникальному индексу (facet, product_info),
+несколько значений одного параметра объединяются (ИЛИ).
+"""
+import re
+
+from django.db import connection
+from django.db.models import Count
+
+from .models import FacetValue, OfferFacet, ProductInfo, ProductParameter
+
+
+FACET_PARAM = re.compile(r"^param\[(.+)\]$")
+
+
+def parse_facet_filters(query_params):
+    """Возвращает {имя параметра: [значения]} из param[Имя]=значение."""
+    filters = {}
+    for key in query_params:
+        match = FACET_PARAM.match(key)
+        if not match:
+            continue
+        values = [value for value in query_params.getlist(key) if value != ""]
+        if values:
+            filters[match.group(1)] = values
+    return filters
+
+
+def filter_by_facets(queryset, filters):
+    """Оставляет товары, у которых есть предложение со всеми фасетами."""
+    if not filters:
+        return queryset
+
+    groups = {name: [] for name in filters}
+    rows = FacetValue.objects.filter(
+        parameter__name__in=filters.keys(),
+        value__in=[value for values in filters.values() for value in values],
+    ).values_list("id", "parameter__name", "value")
+    for facet_id, name, value in rows:
+        if value in filters[name]:
+            groups[name].append(facet_id)
+
+    if not all(groups.values()):
+        # такого значения нет ни у одного предложения
+        return queryset.none()
+
+    # каждое следующее множество предложений ищется внутри предыдущего
+    offers = None
+    for facet_ids in groups.values():
+        step = OfferFacet.objects.filter(facet_id__in=facet_ids)
+        if offers is not None:
+            step = step.filter(product_info_id__in=offers)
+        offers = step.values("product_info_id")
+
+    return queryset.filter(pk__in=step.values("product_id"))
+
+
+def facet_counts(queryset):
+    """
+    Считает фасеты по набору товаров queryset.
+
+    Возвращает {имя параметра: [{"value": ..., "count": число товаров}]},
+    значения отсортированы по убыванию числа товаров.
+    """
+    rows = (
+        OfferFacet.objects.filter(product_id__in=queryset.values("pk"))
+        .values("facet__parameter__name", "facet__value")
+        .annotate(count=Count("product_id", distinct=True))
+        .order_by("facet__parameter__name", "-count", "facet__value")
+    )
+
+    facets = {}
+    for row in rows:
+        facets.setdefault(row["facet__parameter__name"], []).append(
+            {"value": row["facet__value"], "count": row["count"]}
+        )
+    return facets
+
+
+def _facet_ids(pairs, batch_size):
+    """(id параметра, значение) -> id фасета, недостающие фасеты создаются."""
+    found = {}
+    parameter_ids = {parameter_id for parameter_id, _ in pairs}
+    values = {value for _, value in pairs}
+
+    def load():
+        rows = FacetValue.objects.filter(
+            parameter_id__in=parameter_ids, value__in=values
+        ).values_list("parameter_id", "value", "id")
+        found.update(
+            ((parameter_id, value), facet_id)
+            for parameter_id, value, facet_id in rows
+            if (parameter_id, value) in pairs
+        )
+
+    load()
+    missing = pairs - found.keys()
+    if missing:
+        # фасеты общие для всех магазинов — без гонок между процессами импорта
+        FacetValue.objects.bulk_create(
+            [FacetValue(parameter_id=p, value=v) for p, v in missing],
+            ignore_conflicts=True,
+            batch_size=batch_size,
+        )
+        load()
+    return found
+
+
+def index_offers(offers, batch_size=1000):
+    """
+    Пересобирает фасеты предложений.
+
+    offers — список (id предложения, id товара, {id параметра: значение}).
+    """
+    if not offers:
+        return
+
+    pairs = {
+        (parameter_id, value)
+        for _, _, parameters in offers
+        for parameter_id, value in parameters.items()
+    }
+    facet_ids = _facet_ids(pairs, batch_size)
+
+    OfferFacet.objects.filter(
+        product_info_id__in=[product_info_id for product_info_id, _, _ in offers]
+    ).delete()
+    OfferFacet.objects.bulk_create(
+        [
+            OfferFacet(
+                facet_id=facet_ids[(parameter_id, value)],
+                product_info_id=product_info_id,
+                product_id=product_id,
+            )
+            for product_info_id, product_id, parameters in offers
+            for parameter_id, value in parameters.items()
+        ],
+        ignore_conflicts=True,
+        batch_size=batch_size,
+    )
+
+
+def rebuild_facets(using=connection):
+    """Полностью перестраивает индекс фасетов по ProductParameter."""
+    facet = FacetValue._meta.db_table
+    offer_facet = OfferFacet._meta.db_table
+    parameter = ProductParameter._meta.db_table
+    product_info = ProductInfo._meta.db_table
+
+    with using.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {offer_facet}")
+        cursor.execute(f"""
+            INSERT INTO {facet} (parameter_id, value)
+            SELECT DISTINCT pp.parameter_id, pp.value FROM {parameter} pp
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {facet} f
+                WHERE f.parameter_id = pp.parameter_id AND f.value = pp.value
+            )
+        """)
+        cursor.execute(f"""
+            INSERT INTO {offer_facet} (facet_id, product_info_id, product_id)
+            SELECT DISTINCT f.id, pp.product_info_id, pi.product_id
+            FROM {parameter} pp
+            JOIN {product_info} pi ON pi.id = pp.product_info_id
+            JOIN {facet} f ON f.parameter_id = pp.parameter_id AND f.value = pp.value
+        """)
+        # значения, которых больше нет ни у одного предложения
+        cursor.execute(f"""
+            DELETE FROM {facet}
+            WHERE NOT EXISTS (SELECT 1 FROM {offer_facet} o WHERE o.facet_id = {facet}.id)
+        """)
+        cursor.execute(f"SELECT COUNT(*) FROM {offer_facet}")
+        return cursor.fetchone()[0]
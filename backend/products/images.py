@@ -0,0 +1,34 @@
+"""
+URL изображений каталога без обращений к хранилищу.
+
+Пути оригинала и миниатюр уже лежат в документе каталога (CatalogEntry.image,
+CatalogEntry.image_preview — их пишет products/thumbnails.py), поэтому URL
+собирается из префикса MEDIA_URL (base_url хранилища) склейкой строк:
+без storage.url(), stat и генерации миниатюр внутри запроса. Абсолютный
+префикс вычисляется один раз на запрос, а не на каждое изображение.
+"""
+from django.utils.encoding import filepath_to_uri
+
+from .models import Product
+
+
+# алиас THUMBNAIL_ALIASES, который отдаётся в списках как image_preview
+PREVIEW_ALIAS = "product_preview"
+
+
+def image_url_resolver(request=None):
+    """Возвращает функцию путь -> URL (абсолютный, если передан запрос)."""
+    storage = Product._meta.get_field("image").storage
+    base_url = getattr(storage, "base_url", None)
+    if base_url is None:
+        # удалённое хранилище без общего префикса — URL строит оно само
+        if request is None:
+            return lambda name: storage.url(name) if name else None
+        return lambda name: request.build_absolute_uri(storage.url(name)) if name else None
+
+    prefix = request.build_absolute_uri(base_url) if request is not None else base_url
+
+    def resolve(name):
+        return prefix + filepath_to_uri(name).lstrip("/") if name else None
+
+    return resolve
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from products.thumbnails import (
+    THUMBNAIL_BATCH_SIZE,
+    render_in_pool,
+    schedule_thumbnails,
+    thumbnail_sources,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-renders every THUMBNAIL_ALIASES entry for existing product images "
+        "and avatars, skipping thumbnails that are already up to date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Worker processes (CPU count by default).")
+        parser.add_argument("--batch-size", type=int, default=THUMBNAIL_BATCH_SIZE)
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="Enqueue Celery tasks instead of rendering in a local process pool.",
+        )
+
+    def handle(self, *args, **options):
+        for target, names in thumbnail_sources():
+            names = list(names)
+            if options["queue"]:
+                batches = schedule_thumbnails(names, target, options["batch_size"])
+                self.stdout.write(f"{target}: {len(names)} images, {batches} tasks queued")
+                continue
+
+            stats = render_in_pool(
+                names, target, workers=options["workers"], batch_size=options["batch_size"]
+            )
+            self.stdout.write(
+                f"{target}: {len(names)} images, "
+                + ", ".join(f"{key} {value}" for key, value in stats.items())
+            )
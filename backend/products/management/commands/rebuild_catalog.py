@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.catalog import CATALOG_CHUNK_SIZE, rebuild_catalog
+
+
+class Command(BaseCommand):
+    help = "Rebuilds denormalized catalog documents (CatalogEntry) for all products."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=CATALOG_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rebuild_catalog(chunk_size=options["chunk_size"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} catalog entries in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from products.search import is_supported, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text product search index from scratch."
+
+    def handle(self, *args, **options):
+        if not is_supported(connection):
+            raise CommandError(f"Search is not supported on {connection.vendor}")
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            indexed = rebuild_index(connection)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {indexed} products in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_image'),
+        ('shops', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productinfo',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='productinfo',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='productinfo',
+            name='model',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name='productinfo',
+            constraint=models.UniqueConstraint(fields=('shop', 'external_id'), name='productinfo_shop_external_id_uniq'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:49
+
+from django.db import migrations, models
+
+
+def merge_duplicate_parameters(apps, schema_editor):
+    # перед добавлением unique сливаем параметры с одинаковым именем в первый
+    Parameter = apps.get_model('products', 'Parameter')
+    ProductParameter = apps.get_model('products', 'ProductParameter')
+
+    kept = {}
+    for parameter in Parameter.objects.order_by('id'):
+        original = kept.setdefault(parameter.name, parameter)
+        if original.id == parameter.id:
+            continue
+        ProductParameter.objects.filter(parameter=parameter).update(parameter=original)
+        parameter.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_productinfo_external_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_parameters, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='parameter',
+            name='name',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
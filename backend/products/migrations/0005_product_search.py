@@ -0,0 +1,27 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:20
+
+from django.db import migrations
+
+from products.search import create_search_table, drop_search_table, rebuild_index
+
+
+def create_index(apps, schema_editor):
+    # FTS5 в SQLite, tsvector + GIN в PostgreSQL; сразу заполняем по текущим товарам
+    create_search_table(schema_editor)
+    rebuild_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_table(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_alter_parameter_name'),
+        ('shops', '0002_alter_category_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
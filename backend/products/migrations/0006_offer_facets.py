@@ -0,0 +1,51 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from products.facets import rebuild_facets
+
+
+def build_facets(apps, schema_editor):
+    # заполняем индекс фасетов по уже загруженным параметрам
+    rebuild_facets(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.CharField(max_length=255)),
+                ('parameter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facet_values', to='products.parameter')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OfferFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offers', to='products.facetvalue')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facets', to='products.product')),
+                ('product_info', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facets', to='products.productinfo')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='facetvalue',
+            constraint=models.UniqueConstraint(fields=('parameter', 'value'), name='facetvalue_parameter_value_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='offerfacet',
+            index=models.Index(fields=['product', 'facet'], name='offerfacet_product_facet_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='offerfacet',
+            constraint=models.UniqueConstraint(fields=('facet', 'product_info'), name='offerfacet_facet_product_info_uniq'),
+        ),
+        migrations.RunPython(build_facets, migrations.RunPython.noop),
+    ]
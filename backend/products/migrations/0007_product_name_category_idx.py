@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_offer_facets'),
+        ('shops', '0003_shop_name_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name', 'category'], name='product_name_category_idx'),
+        ),
+    ]
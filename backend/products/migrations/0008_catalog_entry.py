@@ -0,0 +1,58 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from products.catalog import offer_documents
+
+
+def fill_catalog(apps, schema_editor):
+    # начальное заполнение по историческим моделям, в формате ProductInfoSerializer;
+    # дальше документы обновляют импорт и правки в админке (schedule_refresh)
+    Product = apps.get_model('products', 'Product')
+    ProductInfo = apps.get_model('products', 'ProductInfo')
+    ProductParameter = apps.get_model('products', 'ProductParameter')
+    CatalogEntry = apps.get_model('products', 'CatalogEntry')
+
+    product_ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(product_ids), 500):
+        chunk = product_ids[start:start + 500]
+        offers = offer_documents(chunk, ProductInfo, ProductParameter)
+
+        CatalogEntry.objects.bulk_create([
+            CatalogEntry(
+                product_id=row['id'],
+                category_id=row['category_id'],
+                name=row['name'],
+                category_name=row['category__name'],
+                image=row['image'] or '',
+                offers=offers.get(row['id'], []),
+            )
+            for row in Product.objects.filter(id__in=chunk).values(
+                'id', 'name', 'category_id', 'category__name', 'image'
+            )
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_name_category_idx'),
+        ('shops', '0003_shop_name_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogEntry',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='catalog_entry', serialize=False, to='products.product')),
+                ('name', models.CharField(max_length=255)),
+                ('category_name', models.CharField(max_length=255)),
+                ('image', models.CharField(blank=True, default='', max_length=100)),
+                ('offers', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='catalog_entries', to='shops.category')),
+            ],
+        ),
+        migrations.RunPython(fill_catalog, migrations.RunPython.noop),
+    ]
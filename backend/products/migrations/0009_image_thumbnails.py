@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_catalog_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogentry',
+            name='image_preview',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
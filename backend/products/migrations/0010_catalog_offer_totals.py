@@ -0,0 +1,64 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:35
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_offer_totals(apps, schema_editor):
+    # агрегаты для уже собранных документов; дальше их пишет products/catalog.py
+    ProductInfo = apps.get_model('products', 'ProductInfo')
+    CatalogEntry = apps.get_model('products', 'CatalogEntry')
+
+    totals = ProductInfo.objects.values('product_id').annotate(
+        best_price=Coalesce(Min('price', filter=Q(quantity__gt=0)), Min('price')),
+        stock=Sum('quantity'),
+        shops=Count('shop', distinct=True),
+    )
+    entries = [
+        CatalogEntry(
+            product_id=row['product_id'],
+            min_price=row['best_price'],
+            total_quantity=row['stock'],
+            shops_count=row['shops'],
+        )
+        for row in totals.order_by('product_id')
+    ]
+    CatalogEntry.objects.bulk_update(
+        entries, ['min_price', 'total_quantity', 'shops_count'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_image_thumbnails'),
+        ('shops', '0003_shop_name_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogentry',
+            name='min_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='catalogentry',
+            name='shops_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='catalogentry',
+            name='total_quantity',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(fields=['min_price', 'product'], name='catalogentry_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogentry',
+            index=models.Index(fields=['total_quantity'], name='catalogentry_quantity_idx'),
+        ),
+        migrations.RunPython(fill_offer_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations, models
+
+
+def split_parameters(apps, schema_editor):
+    # параметры предложений уходят из offers в отдельный столбец
+    CatalogEntry = apps.get_model('products', 'CatalogEntry')
+
+    entries = []
+    for entry in CatalogEntry.objects.only('offers').iterator(chunk_size=500):
+        entry.offer_parameters = [offer.pop('parameters', []) for offer in entry.offers]
+        entries.append(entry)
+    CatalogEntry.objects.bulk_update(
+        entries, ['offers', 'offer_parameters'], batch_size=500
+    )
+
+
+def join_parameters(apps, schema_editor):
+    CatalogEntry = apps.get_model('products', 'CatalogEntry')
+
+    entries = []
+    for entry in CatalogEntry.objects.only('offers', 'offer_parameters').iterator(
+        chunk_size=500
+    ):
+        entry.offers = [
+            {**offer, 'parameters': parameters}
+            for offer, parameters in zip(entry.offers, entry.offer_parameters)
+        ]
+        entries.append(entry)
+    CatalogEntry.objects.bulk_update(entries, ['offers'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_catalog_offer_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogentry',
+            name='offer_parameters',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(split_parameters, join_parameters),
+    ]
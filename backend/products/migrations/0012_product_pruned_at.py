@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_catalog_offer_parameters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='pruned_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -3,6 +3,22 @@ from shops.models import Shop, Category
 from easy_thumbnails.fields import ThumbnailerImageField
 
 
+class ProductQuerySet(models.QuerySet):
+    def for_catalog(self):
+        # всё, что выводят сериализаторы каталога, — за 3 запроса
+        # независимо от числа товаров: товары+категории, предложения+магазины,
+        # значения параметров+имена параметров
+        return self.select_related('category').prefetch_related(
+            models.Prefetch(
+                'product_infos',
+                queryset=ProductInfo.objects.select_related('shop'),
+            ),
+            models.Prefetch(
+                'product_infos__parameters',
+                queryset=ProductParameter.objects.select_related('parameter'),
+            ),
+        )
+
 
 class Product(models.Model):
     name = models.CharField(max_length=255)
@@ -16,6 +32,19 @@ class Product(models.Model):
         blank=True,
         null=True,
     )
+    # пути готовых миниатюр {алиас: путь}, их пишет products/thumbnails.py
+    thumbnails = models.JSONField(default=dict, blank=True)
+    # когда синхронизация прайса (sync=delete) удалила предложения товара;
+    # товары без предложений с этой отметкой удаляет cleanup_orphaned_catalog
+    pruned_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # поиск товара импортом по имени и категории
+            models.Index(fields=['name', 'category'], name='product_name_category_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -35,16 +64,31 @@ class ProductInfo(models.Model):
     quantity = models.PositiveIntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     price_rrc = models.DecimalField(max_digits=10, decimal_places=2)
+    # id товара в прайсе поставщика и его модель (поля id и model в YAML)
+    external_id = models.CharField(max_length=64, blank=True, null=True)
+    model = models.CharField(max_length=255, blank=True, default='')
+    # хеш содержимого товара из прайса: совпал — строку при импорте не трогаем
+    content_hash = models.CharField(max_length=40, blank=True, default='')
     
     class Meta:
         unique_together = ('product', 'shop')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['shop', 'external_id'],
+                name='productinfo_shop_external_id_uniq',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.shop.name} - {self.price}"
 
 
 class Parameter(models.Model):
-    name = models.CharField(max_length=255)
+    # имя уникально, чтобы параллельный импорт не плодил дубли
+    name = models.CharField(max_length=255, unique=True)
+    # недавно созданные параметры cleanup_orphaned_catalog не трогает:
+    # импорт мог ещё не записать их значения (пусто — созданы до этого поля)
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
 
     def __str__(self):
         return self.name
@@ -70,3 +114,113 @@ class ProductParameter(models.Model):
 
 
 
+
+
+class CatalogEntry(models.Model):
+    """
+    Готовый документ товара для API каталога.
+
+    Название, категория и предложения с параметрами (в формате
+    ProductInfoSerializer) хранятся в одной строке, поэтому список
+    и карточка товара читают одну строку на товар без join'ов.
+    Обновляется импортом и при правках в админке (products/catalog.py).
+    """
+    product = models.OneToOneField(
+        Product,
+        primary_key=True,
+        related_name='catalog_entry',
+        on_delete=models.CASCADE
+    )
+    category = models.ForeignKey(
+        Category,
+        related_name='catalog_entries',
+        on_delete=models.CASCADE
+    )
+    name = models.CharField(max_length=255)
+    category_name = models.CharField(max_length=255)
+    # путь к изображению в хранилище (как в Product.image)
+    image = models.CharField(max_length=100, blank=True, default='')
+    # путь к миниатюре product_preview, пусто — ещё не готова
+    image_preview = models.CharField(max_length=255, blank=True, default='')
+    # предложения без параметров и, отдельно, их параметры (список
+    # на каждое предложение, в том же порядке): параметры — самая большая
+    # часть документа и читаются только при ?expand=product_infos.parameters
+    offers = models.JSONField(default=list)
+    offer_parameters = models.JSONField(default=list)
+    # агрегаты по предложениям: цена лучшего предложения (из тех, что
+    # в наличии, если такие есть), суммарный остаток и число магазинов
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    total_quantity = models.PositiveIntegerField(default=0)
+    shops_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # ?ordering=price и фильтры по цене; pk — для курсорной пагинации
+            models.Index(fields=['min_price', 'product'], name='catalogentry_price_idx'),
+            models.Index(fields=['total_quantity'], name='catalogentry_quantity_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class FacetValue(models.Model):
+    """
+    Значение параметра как фасет каталога: (параметр, значение).
+    """
+    parameter = models.ForeignKey(
+        Parameter,
+        related_name='facet_values',
+        on_delete=models.CASCADE
+    )
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['parameter', 'value'],
+                name='facetvalue_parameter_value_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.parameter.name}: {self.value}"
+
+
+class OfferFacet(models.Model):
+    """
+    Индекс фасетов: фасет -> предложение (и его товар).
+
+    Строится импортом из ProductParameter; фильтр по нескольким фасетам —
+    пересечение множеств предложений по уникальному индексу (facet, product_info),
+    без цепочки join'ов ProductParameter на каждый фасет.
+    """
+    facet = models.ForeignKey(
+        FacetValue,
+        related_name='offers',
+        on_delete=models.CASCADE
+    )
+    product_info = models.ForeignKey(
+        ProductInfo,
+        related_name='facets',
+        on_delete=models.CASCADE
+    )
+    # товар предложения (денормализовано, чтобы не join'ить ProductInfo)
+    product = models.ForeignKey(
+        Product,
+        related_name='facets',
+        on_delete=models.CASCADE
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['facet', 'product_info'],
+                name='offerfacet_facet_product_info_uniq',
+            ),
+        ]
+        indexes = [
+            # подсчёт фасетов по набору товаров
+            models.Index(fields=['product', 'facet'], name='offerfacet_product_facet_idx'),
+        ]
@@ -0,0 +1,115 @@
+"""
+Списки товаров без сериализаторов.
+
+Строки берутся из CatalogEntry через .values() и сразу собираются
+в тот же JSON, что отдаёт CatalogEntrySerializer (и ProductSerializer):
+на странице в 200 товаров это избавляет от создания моделей и
+обхода полей сериализатора. Совпадение форматов проверяет тест
+api.tests.ListProjectionTestCase.
+
+Поддерживаются sparse fieldsets: ?fields=id,name — только эти поля,
+?expand=product_infos — предложения, ?expand=product_infos.parameters —
+предложения с параметрами. Из базы читаются только столбцы выбранных
+полей: без предложений не читается документ offers, без параметров —
+offer_parameters.
+"""
+from .images import image_url_resolver
+
+
+# поле ответа -> столбец CatalogEntry; порядок — порядок полей в ответе
+FIELD_COLUMNS = {
+    "id": "pk",
+    "name": "name",
+    "category": "category_name",
+    "product_infos": "offers",
+    "image": "image",
+    "image_preview": "image_preview",
+}
+CATALOG_FIELDS = tuple(FIELD_COLUMNS)
+
+OFFERS, PARAMETERS = "product_infos", "product_infos.parameters"
+EXPANSIONS = (OFFERS, PARAMETERS)
+
+
+def _names(query_params, name):
+    return [
+        value.strip()
+        for values in query_params.getlist(name)
+        for value in values.split(",")
+        if value.strip()
+    ]
+
+
+def parse_fieldset(query_params):
+    """
+    Возвращает (поля ответа, нужны ли параметры предложений).
+
+    Без ?fields= и ?expand= — полный ответ, как раньше. Если клиент
+    выбирает поля, предложения и параметры нужно запросить явно.
+    Неизвестные имена — ValueError.
+    """
+    fields, expand = _names(query_params, "fields"), _names(query_params, "expand")
+    if not fields and not expand:
+        return CATALOG_FIELDS, True
+
+    unknown = [name for name in fields if name not in FIELD_COLUMNS]
+    unknown += [name for name in expand if name not in EXPANSIONS]
+    if unknown:
+        raise ValueError(
+            f"unknown fields: {', '.join(unknown)}; fields: {', '.join(CATALOG_FIELDS)}, "
+            f"expand: {', '.join(EXPANSIONS)}"
+        )
+
+    selected = set(fields or [name for name in CATALOG_FIELDS if name != OFFERS])
+    if expand:
+        selected.add(OFFERS)
+    return tuple(name for name in CATALOG_FIELDS if name in selected), PARAMETERS in expand
+
+
+def catalog_values(fields=CATALOG_FIELDS, parameters=True):
+    """Столбцы CatalogEntry для .values(); pk нужен курсорной пагинации."""
+    columns = ["pk", *(FIELD_COLUMNS[name] for name in fields)]
+    if parameters and OFFERS in fields:
+        columns.append("offer_parameters")
+    return tuple(dict.fromkeys(columns))
+
+
+def with_parameters(offers, offer_parameters):
+    """Предложения документа вместе с параметрами (формат ProductInfoSerializer)."""
+    return [
+        {**offer, "parameters": parameters}
+        for offer, parameters in zip(offers, offer_parameters)
+    ]
+
+
+def catalog_entries(rows, request=None, fields=CATALOG_FIELDS, parameters=True):
+    """Строки CatalogEntry.objects.values(*catalog_values(fields)) -> товары списка."""
+    image_url = image_url_resolver(request)
+
+    if fields == CATALOG_FIELDS and parameters:
+        # полный ответ — самый частый, собираем без проверок по полям
+        return [
+            {
+                "id": row["pk"],
+                "name": row["name"],
+                "category": {"name": row["category_name"]},
+                "product_infos": with_parameters(row["offers"], row["offer_parameters"]),
+                "image": image_url(row["image"]),
+                "image_preview": image_url(row["image_preview"]),
+            }
+            for row in rows
+        ]
+
+    builders = {
+        "id": lambda row: row["pk"],
+        "name": lambda row: row["name"],
+        "category": lambda row: {"name": row["category_name"]},
+        "product_infos": (
+            (lambda row: with_parameters(row["offers"], row["offer_parameters"]))
+            if parameters else (lambda row: row["offers"])
+        ),
+        "image": lambda row: image_url(row["image"]),
+        "image_preview": lambda row: image_url(row["image_preview"]),
+    }
+    selected = [(name, builders[name]) for name in fields]
+    return [{name: build(row) for name, build in selected} for row in rows]
@@ -0,0 +1,196 @@
+"""
+Полнотекстовый поиск по товарам.
+
+Индекс — отдельная таблица products_search: одна строка на товар
+с его названием, названием категории и значениями параметров всех
+предложений. В SQLite это виртуальная таблица FTS5 (ранжирование bm25,
+префиксный индекс), в PostgreSQL — столбец tsvector с GIN-индексом
+(ts_rank, префиксы через :*). Импорт обновляет строки затронутых
+товаров, полная перестройка — команда rebuild_search_index.
+"""
+import re
+
+from django.db import connection
+
+
+SEARCH_TABLE = "products_search"
+
+# сколько id товаров обновляется одним оператором
+INDEX_CHUNK_SIZE = 500
+
+# веса полей: название товара важнее категории, категория — параметров
+NAME_WEIGHT, CATEGORY_WEIGHT, PARAMETERS_WEIGHT = 10.0, 5.0, 1.0
+
+# минимальная длина слова запроса, которое ищется как префикс
+MIN_PREFIX = 2
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+# значения параметров товара по всем предложениям, без повторов
+_PARAMETERS_SQL = {
+    "sqlite": """
+        SELECT group_concat(value, ' ') FROM (
+            SELECT DISTINCT pp.value
+            FROM products_productparameter pp
+            JOIN products_productinfo pi ON pi.id = pp.product_info_id
+            WHERE pi.product_id = p.id
+        )
+    """,
+    "postgresql": """
+        SELECT string_agg(DISTINCT pp.value, ' ')
+        FROM products_productparameter pp
+        JOIN products_productinfo pi ON pi.id = pp.product_info_id
+        WHERE pi.product_id = p.id
+    """,
+}
+
+_INDEX_SQL = {
+    "sqlite": f"""
+        INSERT INTO {SEARCH_TABLE} (rowid, name, category, parameters)
+        SELECT p.id, p.name, c.name, COALESCE(({_PARAMETERS_SQL['sqlite']}), '')
+        FROM products_product p
+        JOIN shops_category c ON c.id = p.category_id
+    """,
+    "postgresql": f"""
+        INSERT INTO {SEARCH_TABLE} (product_id, document)
+        SELECT
+            p.id,
+            setweight(to_tsvector('simple', p.name), 'A')
+            || setweight(to_tsvector('simple', c.name), 'B')
+            || setweight(to_tsvector(
+                'simple', COALESCE(({_PARAMETERS_SQL['postgresql']}), '')
+            ), 'C')
+        FROM products_product p
+        JOIN shops_category c ON c.id = p.category_id
+    """,
+}
+
+_SEARCH_SQL = {
+    "sqlite": f"""
+        SELECT rowid FROM {SEARCH_TABLE}
+        WHERE {SEARCH_TABLE} MATCH %s
+        ORDER BY bm25({SEARCH_TABLE}, {NAME_WEIGHT}, {CATEGORY_WEIGHT}, {PARAMETERS_WEIGHT}), rowid
+        LIMIT %s
+    """,
+    "postgresql": f"""
+        SELECT product_id FROM {SEARCH_TABLE}
+        WHERE document @@ to_tsquery('simple', %s)
+        ORDER BY ts_rank(document, to_tsquery('simple', %s)) DESC, product_id
+        LIMIT %s
+    """,
+}
+
+
+def create_search_table(schema_editor):
+    """Создаёт таблицу индекса (вызывается из миграции)."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        # prefix='2 3' — отдельный индекс для коротких префиксов запроса
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            "name, category, parameters, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE TABLE {SEARCH_TABLE} ("
+            "product_id bigint PRIMARY KEY "
+            "REFERENCES products_product (id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {SEARCH_TABLE}_document_gin "
+            f"ON {SEARCH_TABLE} USING GIN (document)"
+        )
+
+
+def drop_search_table(schema_editor):
+    if schema_editor.connection.vendor in _INDEX_SQL:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def is_supported(using=connection):
+    return using.vendor in _INDEX_SQL
+
+
+def _key_column(vendor):
+    return "rowid" if vendor == "sqlite" else "product_id"
+
+
+def index_products(product_ids, using=connection):
+    """Пересобирает строки индекса для указанных товаров."""
+    if not is_supported(using):
+        return
+
+    vendor = using.vendor
+    product_ids = list(dict.fromkeys(product_ids))
+
+    with using.cursor() as cursor:
+        for start in range(0, len(product_ids), INDEX_CHUNK_SIZE):
+            chunk = product_ids[start:start + INDEX_CHUNK_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} "
+                f"WHERE {_key_column(vendor)} IN ({placeholders})",
+                chunk,
+            )
+            cursor.execute(
+                f"{_INDEX_SQL[vendor]} WHERE p.id IN ({placeholders})", chunk
+            )
+
+
+def remove_products(product_ids, using=connection):
+    """Удаляет товары из индекса (в PostgreSQL это делает ON DELETE CASCADE)."""
+    if using.vendor != "sqlite":
+        return
+
+    product_ids = list(product_ids)
+    with using.cursor() as cursor:
+        for start in range(0, len(product_ids), INDEX_CHUNK_SIZE):
+            chunk = product_ids[start:start + INDEX_CHUNK_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", chunk
+            )
+
+
+def rebuild_index(using=connection):
+    """Полностью перестраивает индекс одним INSERT ... SELECT."""
+    if not is_supported(using):
+        return 0
+
+    with using.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cursor.execute(_INDEX_SQL[using.vendor])
+        cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def _match_query(query, vendor):
+    # каждое слово запроса — префикс, все слова обязательны;
+    # спецсимволы FTS5/tsquery из запроса не попадают.
+    # Однобуквенный префикс совпадает с половиной индекса — такие слова ищем целиком
+    tokens = _TOKEN.findall(query.lower())
+    if vendor == "sqlite":
+        return " ".join(
+            f'"{token}"*' if len(token) >= MIN_PREFIX else f'"{token}"' for token in tokens
+        )
+    return " & ".join(
+        f"{token}:*" if len(token) >= MIN_PREFIX else token for token in tokens
+    )
+
+
+def search_products(query, limit, using=connection):
+    """Возвращает id товаров, подходящих под запрос, от наиболее релевантных."""
+    if not is_supported(using):
+        raise NotImplementedError(f"search is not supported on {using.vendor}")
+
+    match = _match_query(query, using.vendor)
+    if not match:
+        return []
+
+    params = [match, limit] if using.vendor == "sqlite" else [match, match, limit]
+    with using.cursor() as cursor:
+        cursor.execute(_SEARCH_SQL[using.vendor], params)
+        return [row[0] for row in cursor.fetchall()]
@@ -1,5 +1,17 @@
+from django.utils.functional import cached_property
 from rest_framework import serializers
-from .models import Product, ProductInfo, ProductParameter, Parameter, Category
+from .images import PREVIEW_ALIAS, image_url_resolver
+from .models import (
+    CatalogEntry, Category, Parameter, Product, ProductInfo, ProductParameter,
+)
+from .projections import with_parameters
+
+
+class ImageURLMixin:
+    # URL изображений без обращений к хранилищу (products/images.py)
+    @cached_property
+    def image_url(self):
+        return image_url_resolver(self.context.get('request'))
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -44,15 +56,23 @@ class ProductInfoSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(ImageURLMixin, serializers.ModelSerializer):
     # сериализатор списка товаров (категория + предложения по магазинам)
     category = CategorySerializer()
     product_infos = ProductInfoSerializer(many=True)
-    image = serializers.ImageField(read_only=True)
+    image = serializers.SerializerMethodField()
+    image_preview = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
-        fields = ['id', 'name', 'category', 'product_infos', 'image']
+        fields = ['id', 'name', 'category', 'product_infos', 'image', 'image_preview']
+
+    def get_image(self, product):
+        return self.image_url(product.image.name)
+
+    def get_image_preview(self, product):
+        # миниатюра ещё не готова — null
+        return self.image_url(product.thumbnails.get(PREVIEW_ALIAS))
 
 
 class ProductDetailSerializer(serializers.ModelSerializer):
@@ -67,3 +87,53 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         model = Product
         fields = ['id', 'name', 'category', 'product_infos']
 
+
+class CatalogEntrySerializer(ImageURLMixin, serializers.ModelSerializer):
+    # список товаров из готового документа CatalogEntry, формат как у ProductSerializer
+    id = serializers.IntegerField(source='product_id')
+    category = serializers.SerializerMethodField()
+    product_infos = serializers.SerializerMethodField()
+    image = serializers.SerializerMethodField()
+    image_preview = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CatalogEntry
+        fields = ['id', 'name', 'category', 'product_infos', 'image', 'image_preview']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # ?fields= / ?expand= (products/projections.py: parse_fieldset)
+        selected = self.context.get('fields')
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+    def get_product_infos(self, entry):
+        # параметры хранятся отдельно и читаются только по запросу
+        if not self.context.get('parameters', True):
+            return entry.offers
+        return with_parameters(entry.offers, entry.offer_parameters)
+
+    def get_category(self, entry):
+        return {'name': entry.category_name}
+
+    def get_image(self, entry):
+        # как ImageField: абсолютный URL, если есть запрос
+        return self.image_url(entry.image)
+
+    def get_image_preview(self, entry):
+        return self.image_url(entry.image_preview)
+
+
+class CatalogEntryDetailSerializer(serializers.ModelSerializer):
+    # карточка товара из CatalogEntry, формат как у ProductDetailSerializer
+    id = serializers.IntegerField(source='product_id')
+    category = serializers.CharField(source='category_name')
+    product_infos = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CatalogEntry
+        fields = ['id', 'name', 'category', 'product_infos']
+
+    def get_product_infos(self, entry):
+        return with_parameters(entry.offers, entry.offer_parameters)
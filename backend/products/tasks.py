@@ -1,13 +1,55 @@
+from datetime import timedelta
+
 from celery import shared_task
-from .models import Product
+from django.db.models import Q
+from django.utils import timezone
+from .models import FacetValue, Parameter, Product
+from .search import remove_products
+from .thumbnails import PRODUCT_IMAGE, render_thumbnails
+from .versions import bump
+
+
+@shared_task
+def generate_thumbnails(names, target=None):
+    # пачка исходных изображений: все алиасы THUMBNAIL_ALIASES для поля target
+    return render_thumbnails(names, target)
 
 
 @shared_task
 def generate_product_thumbnails(product_id):
+    # задачи, поставленные до пакетной генерации
     product = Product.objects.filter(id=product_id).first()
     if not product or not product.image:
-        return
+        return None
 
-    product.image.get_thumbnail({'size': (300, 300), 'crop': True})
+    return render_thumbnails([product.image.name], PRODUCT_IMAGE)
 
-    
\ No newline at end of file
+
+# сколько ждать, прежде чем считать товар или параметр без значений брошенным:
+# идущий импорт мог только что создать параметр или загрузить товар по имени
+ORPHAN_GRACE_PERIOD = timedelta(days=1)
+
+
+@shared_task
+def cleanup_orphaned_catalog():
+    # товары без предложений, параметры и фасеты без значений остаются
+    # после синхронизации прайсов (sync=delete) — удаляем их раз в сутки;
+    # товары — только те, чьи предложения удалила синхронизация (pruned_at),
+    # а не заведённые в админке и ещё не получившие предложений
+    settled = timezone.now() - ORPHAN_GRACE_PERIOD
+    orphaned = Product.objects.filter(
+        pruned_at__lt=settled, product_infos__isnull=True
+    )
+    product_ids = list(orphaned.values_list('id', flat=True))
+    # без каскадно удалённых документов каталога
+    _, deleted = orphaned.delete()
+    products = deleted.get(Product._meta.label, 0)
+    remove_products(product_ids)
+    if product_ids:
+        bump(product_ids)
+    parameters, _ = Parameter.objects.filter(
+        Q(created_at__isnull=True) | Q(created_at__lt=settled),
+        productparameter__isnull=True,
+    ).delete()
+    facets, _ = FacetValue.objects.filter(offers__isnull=True).delete()
+    return {'products': products, 'parameters': parameters, 'facets': facets}
@@ -1,2 +1,104 @@
-
 # Create your tests here.
+
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from . import versions
+from .catalog import refresh_entries
+from .models import CatalogEntry, Category, Product
+from .search import index_products, search_products
+from .thumbnails import PRODUCT_IMAGE, render_thumbnails, schedule_thumbnails
+
+
+class RenderThumbnailsTestCase(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        image = BytesIO()
+        Image.new("RGB", (640, 480), "red").save(image, "JPEG")
+        for name in ("products/a.jpg", "products/b.jpg"):
+            default_storage.save(name, ContentFile(image.getvalue()))
+
+    def test_renders_every_alias_once_per_identical_file(self):
+        names = ["products/a.jpg", "products/b.jpg", "products/a.jpg", "products/missing.jpg"]
+
+        stats = render_thumbnails(names, PRODUCT_IMAGE)
+        # два алиаса (avatar, product_preview): b.jpg — копия a.jpg
+        self.assertEqual(
+            stats, {"generated": 2, "copied": 2, "up_to_date": 0, "missing": 1, "failed": 0}
+        )
+        self.assertTrue(default_storage.exists("products/b.jpg.300x300_q85_crop.jpg"))
+
+        stats = render_thumbnails(names, PRODUCT_IMAGE)
+        self.assertEqual((stats["generated"], stats["up_to_date"]), (0, 2))
+
+    def test_stores_thumbnail_paths_for_catalog(self):
+        category = Category.objects.create(name="Смартфоны")
+        product = Product.objects.create(name="Phone", category=category, image="products/a.jpg")
+        refresh_entries([product.id])
+        self.assertEqual(CatalogEntry.objects.get(product=product).image_preview, "")
+
+        render_thumbnails(["products/a.jpg"], PRODUCT_IMAGE)
+
+        product.refresh_from_db()
+        preview = product.thumbnails["product_preview"]
+        self.assertEqual(preview, "products/a.jpg.300x300_q85_crop.jpg")
+        self.assertEqual(CatalogEntry.objects.get(product=product).image_preview, preview)
+
+    def test_tasks_are_queued_after_commit(self):
+        with mock.patch("products.tasks.generate_thumbnails.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                schedule_thumbnails(["products/a.jpg"], PRODUCT_IMAGE)
+                # новое имя изображения ещё не видно воркеру
+                delay.assert_not_called()
+        delay.assert_called_once_with(["products/a.jpg"], PRODUCT_IMAGE)
+
+
+class ProductAdminTestCase(TestCase):
+    def test_rename_updates_search_index(self):
+        admin = get_user_model().objects.create_superuser(
+            username="search_admin", email="admin@test.com", password="12345678"
+        )
+        self.client.force_login(admin)
+        category = Category.objects.create(name="Смартфоны")
+        product = Product.objects.create(name="Apple iPhone XR", category=category)
+        index_products([product.id])
+
+        response = self.client.post(
+            f"/admin/products/product/{product.id}/change/",
+            {"name": "Samsung Galaxy S10", "category": category.id},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(search_products("galaxy", 10), [product.id])
+        self.assertEqual(search_products("iphone", 10), [])
+
+    def test_delete_bumps_catalog_versions(self):
+        admin = get_user_model().objects.create_superuser(
+            username="delete_admin", email="delete@test.com", password="12345678"
+        )
+        self.client.force_login(admin)
+        product = Product.objects.create(
+            name="Apple iPhone XR", category=Category.objects.create(name="Смартфоны")
+        )
+        index_products([product.id])
+        before = versions.product_version(product.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/admin/products/product/{product.id}/delete/", {"post": "yes"}
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertGreater(versions.product_version(product.id), before)
+        self.assertEqual(search_products("iphone", 10), [])
@@ -0,0 +1,202 @@
+"""
+Пакетная генерация миниатюр (easy-thumbnails).
+
+Для каждого исходного изображения рендерятся все алиасы из
+THUMBNAIL_ALIASES, относящиеся к его полю (product_preview, avatar).
+Готовые и не устаревшие миниатюры пропускаются, одинаковые по
+содержимому файлы внутри пачки ресайзятся один раз — результат
+копируется. Пачки выполняются задачами Celery (schedule_thumbnails)
+или в пуле процессов (команда backfill_thumbnails).
+
+Пути готовых миниатюр товаров записываются в Product.thumbnails и
+документ каталога, чтобы списки отдавали URL без обращений к хранилищу
+(products/images.py).
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from easy_thumbnails import utils
+from easy_thumbnails.alias import aliases
+from easy_thumbnails.exceptions import EasyThumbnailsError
+from easy_thumbnails.files import ThumbnailFile, get_thumbnailer
+
+
+logger = logging.getLogger(__name__)
+
+# сколько исходных изображений обрабатывается одной задачей
+THUMBNAIL_BATCH_SIZE = 50
+
+# поля с изображениями: цель алиасов easy-thumbnails
+PRODUCT_IMAGE = "products.Product.image"
+USER_AVATAR = "accounts.User.avatar"
+
+STAT_KEYS = ("generated", "copied", "up_to_date", "missing", "failed")
+
+
+def _digest(name):
+    sha1 = hashlib.sha1()
+    with default_storage.open(name, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def _copy(thumbnailer, options, rendered):
+    # та же картинка под другим именем: имя миниатюры — от этого исходника
+    data, image = rendered
+    thumbnail = ThumbnailFile(
+        thumbnailer.get_thumbnail_name(options, transparent=utils.is_transparent(image)),
+        file=ContentFile(data),
+        storage=thumbnailer.thumbnail_storage,
+        thumbnail_options=options,
+    )
+    thumbnail.image = image
+    return thumbnail
+
+
+def render_thumbnails(names, target=None):
+    """
+    Рендерит миниатюры всех алиасов target для исходников names.
+
+    Возвращает счётчики: generated — отрендерено, copied — скопировано
+    с такого же файла, up_to_date — исходник уже обработан, missing —
+    файла нет, failed — файл не читается как изображение.
+    """
+    stats = dict.fromkeys(STAT_KEYS, 0)
+    alias_options = aliases.all(target=target)
+    # содержимое исходника -> {алиас: (байты миниатюры, изображение)}
+    rendered = {}
+    # исходник -> {алиас: путь миниатюры}
+    paths = {}
+
+    for name in dict.fromkeys(name for name in names if name):
+        if not default_storage.exists(name):
+            stats["missing"] += 1
+            continue
+
+        thumbnailer = get_thumbnailer(name)
+        ready, stale = {}, {}
+        for alias, options in alias_options.items():
+            existing = thumbnailer.get_existing_thumbnail(options)
+            if existing:
+                ready[alias] = existing.name
+            else:
+                stale[alias] = thumbnailer.get_options(options)
+        if not stale:
+            stats["up_to_date"] += 1
+            paths[name] = ready
+            continue
+
+        try:
+            same_file = rendered.setdefault(_digest(name), {})
+            for alias, options in stale.items():
+                if alias in same_file:
+                    thumbnail = _copy(thumbnailer, options, same_file[alias])
+                    stats["copied"] += 1
+                else:
+                    thumbnail = thumbnailer.generate_thumbnail(options)
+                    same_file[alias] = (thumbnail.file.read(), thumbnail.image)
+                    thumbnail.file.seek(0)
+                    stats["generated"] += 1
+                thumbnailer.save_thumbnail(thumbnail)
+                ready[alias] = thumbnail.name
+        except (EasyThumbnailsError, OSError) as e:
+            logger.warning("Thumbnails for %s failed: %s", name, e)
+            stats["failed"] += 1
+        else:
+            paths[name] = ready
+
+    if target == PRODUCT_IMAGE and paths:
+        _store_product_thumbnails(paths)
+    return stats
+
+
+def _store_product_thumbnails(paths):
+    # пути миниатюр -> Product.thumbnails и документы каталога;
+    # товары, у которых пути не изменились, не трогаем
+    from .catalog import refresh_entries
+    from .models import Product
+
+    changed = {}
+    for product_id, image, thumbnails in (
+        Product.objects.filter(image__in=paths).values_list("id", "image", "thumbnails")
+    ):
+        if thumbnails != paths[image]:
+            changed.setdefault(image, []).append(product_id)
+
+    for image, product_ids in changed.items():
+        Product.objects.filter(id__in=product_ids).update(thumbnails=paths[image])
+    refresh_entries([product_id for ids in changed.values() for product_id in ids])
+
+
+def _batches(names, batch_size):
+    names = list(dict.fromkeys(name for name in names if name))
+    return [names[start:start + batch_size] for start in range(0, len(names), batch_size)]
+
+
+def schedule_thumbnails(names, target=None, batch_size=THUMBNAIL_BATCH_SIZE):
+    """
+    Ставит в очередь Celery по задаче на пачку: пачки идут параллельно в воркерах.
+
+    Задачи ставятся после коммита текущей транзакции (вне транзакции — сразу):
+    иначе воркер не найдёт по пути ещё не сохранённое изображение.
+    """
+    from .tasks import generate_thumbnails
+
+    batches = _batches(names, batch_size)
+    for batch in batches:
+        transaction.on_commit(partial(generate_thumbnails.delay, batch, target))
+    return len(batches)
+
+
+def thumbnail_sources():
+    """(цель алиасов, имена файлов) по всем изображениям товаров и аватарам."""
+    from django.contrib.auth import get_user_model
+
+    from .models import Product
+
+    return [
+        (PRODUCT_IMAGE, Product.objects.exclude(image="").values_list("image", flat=True)),
+        (
+            USER_AVATAR,
+            get_user_model().objects.exclude(avatar="").exclude(avatar__isnull=True)
+            .values_list("avatar", flat=True),
+        ),
+    ]
+
+
+def _init_worker():
+    # как в importer.batch: при spawn настраиваем Django, при fork
+    # забываем унаследованные соединения с БД, не закрывая сессию родителя
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    django.setup()
+    for connection in connections.all(initialized_only=True):
+        connection.connection = None
+
+
+def render_in_pool(names, target=None, workers=None, batch_size=THUMBNAIL_BATCH_SIZE,
+                   on_batch=None):
+    """
+    Рендерит миниатюры пачками в пуле из workers процессов.
+
+    Возвращает суммарные счётчики; on_batch(stats) вызывается после каждой пачки.
+    """
+    total = dict.fromkeys(STAT_KEYS, 0)
+    batches = _batches(names, batch_size)
+    if not batches:
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for stats in pool.map(render_thumbnails, batches, [target] * len(batches)):
+            for key, value in stats.items():
+                total[key] += value
+            if on_batch:
+                on_batch(stats)
+    return total
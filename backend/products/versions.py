@@ -0,0 +1,88 @@
+"""
+Версии каталога для кэша ответов API.
+
+Версия — время последнего изменения в наносекундах, хранится в кэше
+без срока жизни: общая версия каталога, версия магазина и версия товара.
+Меняются после коммита каждой пересборки документов каталога
+(products/catalog.py), поэтому кэш ответов, в ключе которого есть
+версия, инвалидируется точно и не зависит от TTL. Если ключ версии
+каталога вытеснен из кэша, создаётся новая версия — старые ответы
+не вернутся. Ключи магазинов и товаров пишет только bump(), для
+существующих объектов: id из запроса не создают ключей без срока жизни.
+"""
+import time
+
+from django.core.cache import cache
+
+from .models import ProductInfo
+
+
+CATALOG_VERSION_KEY = "catalog:version"
+SHOP_VERSION_KEY = "catalog:version:shop:{}"
+PRODUCT_VERSION_KEY = "catalog:version:product:{}"
+
+# сколько товаров обрабатывается одним запросом при поиске их магазинов
+VERSION_CHUNK_SIZE = 500
+
+
+def get_versions(*keys):
+    """Версии по ключам одним чтением из кэша, недостающие создаются."""
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    now = time.time_ns()
+    if missing:
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        # значение мог успеть записать параллельный запрос
+        found.update(cache.get_many(missing))
+    return [found.get(key, now) for key in keys]
+
+
+def catalog_version():
+    return get_versions(CATALOG_VERSION_KEY)[0]
+
+
+def _version_or_catalog(key):
+    # ключа нет (объект не менялся, не существует или ключ вытеснен) —
+    # версия каталога: она меняется при каждом bump() и не старше
+    # версии любого магазина или товара, так что ответ не устареет
+    found = cache.get_many([key, CATALOG_VERSION_KEY])
+    if key in found:
+        return found[key]
+    if CATALOG_VERSION_KEY in found:
+        return found[CATALOG_VERSION_KEY]
+    return catalog_version()
+
+
+def shop_version(shop_id):
+    return _version_or_catalog(SHOP_VERSION_KEY.format(shop_id))
+
+
+def product_version(product_id):
+    return _version_or_catalog(PRODUCT_VERSION_KEY.format(product_id))
+
+
+def bump(product_ids=(), shop_ids=()):
+    """
+    Меняет версии товаров, их магазинов и общую версию каталога.
+
+    Вызывается после коммита: иначе параллельный запрос успел бы
+    закэшировать старые данные под новой версией.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    shop_ids = set(shop_ids)
+
+    for start in range(0, len(product_ids), VERSION_CHUNK_SIZE):
+        chunk = product_ids[start:start + VERSION_CHUNK_SIZE]
+        shop_ids.update(
+            ProductInfo.objects.filter(product_id__in=chunk)
+            .values_list("shop_id", flat=True).distinct()
+        )
+
+    version = time.time_ns()
+    versions = {CATALOG_VERSION_KEY: version}
+    versions.update((SHOP_VERSION_KEY.format(shop_id), version) for shop_id in shop_ids)
+    versions.update(
+        (PRODUCT_VERSION_KEY.format(product_id), version) for product_id in product_ids
+    )
+    cache.set_many(versions, timeout=None)
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Shop
+from products.catalog import schedule_refresh
 from products.models import ProductInfo
 
 
@@ -15,4 +16,17 @@ class ProductInfoInline(admin.TabularInline):
 @admin.register(Shop)
 class ShopAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "user", "is_accepting_orders")
-    inlines = [ProductInfoInline]
\ No newline at end of file
+    inlines = [ProductInfoInline]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+
+        # имя магазина, цены и остатки есть в документах каталога
+        deleted = [
+            obj.product_id for formset in formsets for obj in formset.deleted_objects
+        ]
+        if 'name' in form.changed_data or any(formset.has_changed() for formset in formsets):
+            schedule_refresh(
+                [*form.instance.products.values_list('product_id', flat=True), *deleted],
+                shop_ids=[form.instance.id],
+            )
\ No newline at end of file
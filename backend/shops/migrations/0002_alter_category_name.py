@@ -0,0 +1,35 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:49
+
+from django.db import migrations, models
+
+
+def merge_duplicate_categories(apps, schema_editor):
+    # перед добавлением unique сливаем категории с одинаковым именем в первую
+    Category = apps.get_model('shops', 'Category')
+    Product = apps.get_model('products', 'Product')
+
+    kept = {}
+    for category in Category.objects.order_by('id'):
+        original = kept.setdefault(category.name, category)
+        if original.id == category.id:
+            continue
+        Product.objects.filter(category=category).update(category=original)
+        original.shops.add(*category.shops.all())
+        category.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shops', '0001_initial'),
+        ('products', '0002_product_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_categories, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
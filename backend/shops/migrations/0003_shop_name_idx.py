@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shops', '0002_alter_category_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shop',
+            index=models.Index(fields=['name'], name='shop_name_idx'),
+        ),
+    ]
@@ -13,6 +13,12 @@ class Shop(models.Model):
     is_accepting_orders = models.BooleanField(default=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='shops')
 
+    class Meta:
+        indexes = [
+            # магазин ищется по имени из прайса и в заказах поставщика
+            models.Index(fields=['name'], name='shop_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -21,7 +27,9 @@ class Category(models.Model):
     """
     Модель категории товаров.
     """
-    name = models.CharField(max_length=255)
+    # имя уникально: импорт из нескольких процессов создаёт категории
+    # через INSERT ... ON CONFLICT DO NOTHING без гонок
+    name = models.CharField(max_length=255, unique=True)
     shops = models.ManyToManyField(Shop, related_name='categories')
 
     def __str__(self):